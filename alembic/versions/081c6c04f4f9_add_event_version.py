@@ -0,0 +1,28 @@
+"""add event version
+
+Revision ID: 081c6c04f4f9
+Revises: df14a6506aef
+Create Date: 2026-10-18 13:15:36.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '081c6c04f4f9'
+down_revision: Union[str, None] = 'df14a6506aef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'version')
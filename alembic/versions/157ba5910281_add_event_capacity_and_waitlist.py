@@ -0,0 +1,42 @@
+"""add event capacity and waitlist
+
+Revision ID: 157ba5910281
+Revises: 495ad5117188
+Create Date: 2026-10-18 14:37:20.118954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '157ba5910281'
+down_revision: Union[str, None] = '495ad5117188'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('capacity', sa.Integer(), nullable=True))
+    op.create_table('event_waitlist',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_event_waitlist_event_id_user_id', 'event_waitlist', ['event_id', 'user_id'], unique=True)
+    op.create_index('ix_event_waitlist_event_id_id', 'event_waitlist', ['event_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_event_waitlist_event_id_id', table_name='event_waitlist')
+    op.drop_index('ux_event_waitlist_event_id_user_id', table_name='event_waitlist')
+    op.drop_table('event_waitlist')
+    op.drop_column('events', 'capacity')
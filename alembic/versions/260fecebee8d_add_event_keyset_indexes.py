@@ -0,0 +1,42 @@
+"""add event keyset indexes
+
+Revision ID: 260fecebee8d
+Revises: dd9f35204a63
+Create Date: 2026-10-18 09:12:31.482215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '260fecebee8d'
+down_revision: Union[str, None] = 'dd9f35204a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_event_date_id', 'events', ['event_date', 'id'], unique=False)
+    op.create_index('ix_events_created_at_id', 'events', ['created_at', 'id'], unique=False)
+    op.create_index('ix_events_category_event_date_id', 'events', ['category', 'event_date', 'id'], unique=False)
+    op.create_index('ix_events_category_created_at_id', 'events', ['category', 'created_at', 'id'], unique=False)
+    op.create_index('ix_events_is_approved_event_date_id', 'events', ['is_approved', 'event_date', 'id'], unique=False)
+    op.create_index('ix_events_is_approved_created_at_id', 'events', ['is_approved', 'created_at', 'id'], unique=False)
+    op.create_index('ix_events_category_is_approved_event_date_id', 'events', ['category', 'is_approved', 'event_date', 'id'], unique=False)
+    op.create_index('ix_events_category_is_approved_created_at_id', 'events', ['category', 'is_approved', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_category_is_approved_created_at_id', table_name='events')
+    op.drop_index('ix_events_category_is_approved_event_date_id', table_name='events')
+    op.drop_index('ix_events_is_approved_created_at_id', table_name='events')
+    op.drop_index('ix_events_is_approved_event_date_id', table_name='events')
+    op.drop_index('ix_events_category_created_at_id', table_name='events')
+    op.drop_index('ix_events_category_event_date_id', table_name='events')
+    op.drop_index('ix_events_created_at_id', table_name='events')
+    op.drop_index('ix_events_event_date_id', table_name='events')
@@ -0,0 +1,46 @@
+"""add favorites unique index
+
+Revision ID: 495ad5117188
+Revises: 081c6c04f4f9
+Create Date: 2026-10-18 13:52:11.840326
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '495ad5117188'
+down_revision: Union[str, None] = '081c6c04f4f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблица favorites создавалась через create_all и в миграциях её нет
+    if not sa.inspect(op.get_bind()).has_table('favorites'):
+        op.create_table('favorites',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('event_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    op.execute(
+        """
+        DELETE FROM favorites AS a
+        USING favorites AS b
+        WHERE a.user_id = b.user_id AND a.event_id = b.event_id AND a.id > b.id
+        """
+    )
+    op.create_index('ux_favorites_user_id_event_id', 'favorites', ['user_id', 'event_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_favorites_user_id_event_id', table_name='favorites')
@@ -0,0 +1,40 @@
+"""reconcile schema with models
+
+Revision ID: 5644e5929693
+Revises: c7755fcd923f
+Create Date: 2026-10-18 17:20:54.631027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5644e5929693'
+down_revision: Union[str, None] = 'c7755fcd923f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Раньше приложение при старте вызывало create_all, и часть схемы
+    # в миграции не попала. В базах, поднятых через create_all, это уже есть
+    inspector = sa.inspect(op.get_bind())
+    user_columns = {column['name'] for column in inspector.get_columns('users')}
+    for name in ('first_name', 'last_name'):
+        if name not in user_columns:
+            op.add_column('users', sa.Column(name, sa.String(), server_default='', nullable=False))
+            op.alter_column('users', name, server_default=None)
+
+    event_fks = inspector.get_foreign_keys('events')
+    if not any(fk['constrained_columns'] == ['creator_id'] for fk in event_fks):
+        op.create_foreign_key('events_creator_id_fkey', 'events', 'users', ['creator_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Колонки и ключ могли существовать до этой миграции — не удаляем
+    pass
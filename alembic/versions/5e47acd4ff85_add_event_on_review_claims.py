@@ -0,0 +1,48 @@
+"""add event on review claims
+
+Revision ID: 5e47acd4ff85
+Revises: 157ba5910281
+Create Date: 2026-10-18 15:12:43.507311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e47acd4ff85'
+down_revision: Union[str, None] = '157ba5910281'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # В миграциях events.image_url — строка, а модель давно хранит массив
+    # (база, созданная через create_all, уже с массивом). Одобрение копирует
+    # image_url из заявки в events, поэтому типы должны совпадать.
+    columns = {column['name']: column for column in sa.inspect(op.get_bind()).get_columns('events')}
+    if not isinstance(columns['image_url']['type'], sa.ARRAY):
+        op.alter_column('events', 'image_url',
+                        type_=postgresql.ARRAY(sa.String()),
+                        postgresql_using='CASE WHEN image_url IS NULL THEN NULL ELSE ARRAY[image_url] END')
+
+    op.add_column('events_on_review', sa.Column('image_url', postgresql.ARRAY(sa.String()), nullable=True))
+    op.add_column('events_on_review', sa.Column('capacity', sa.Integer(), nullable=True))
+    op.add_column('events_on_review', sa.Column('claimed_by', sa.Integer(), nullable=True))
+    op.add_column('events_on_review', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key('events_on_review_claimed_by_fkey', 'events_on_review', 'users', ['claimed_by'], ['id'])
+    op.create_index('ix_events_on_review_claimed_by_id', 'events_on_review', ['claimed_by', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_on_review_claimed_by_id', table_name='events_on_review')
+    op.drop_constraint('events_on_review_claimed_by_fkey', 'events_on_review', type_='foreignkey')
+    op.drop_column('events_on_review', 'claimed_at')
+    op.drop_column('events_on_review', 'claimed_by')
+    op.drop_column('events_on_review', 'capacity')
+    op.drop_column('events_on_review', 'image_url')
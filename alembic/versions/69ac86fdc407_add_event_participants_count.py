@@ -0,0 +1,41 @@
+"""add event participants count
+
+Revision ID: 69ac86fdc407
+Revises: 260fecebee8d
+Create Date: 2026-10-18 10:04:17.905613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '69ac86fdc407'
+down_revision: Union[str, None] = '260fecebee8d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('participants_count', sa.Integer(), server_default='0', nullable=False))
+    # Заполняем счётчик по уже существующим записям на мероприятия
+    op.execute(
+        """
+        UPDATE events
+        SET participants_count = counts.total
+        FROM (
+            SELECT event_id, count(*) AS total
+            FROM user_event_association
+            GROUP BY event_id
+        ) AS counts
+        WHERE events.id = counts.event_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'participants_count')
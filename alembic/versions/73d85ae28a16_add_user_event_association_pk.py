@@ -0,0 +1,51 @@
+"""add user event association pk
+
+Revision ID: 73d85ae28a16
+Revises: 4b9af4b92577
+Create Date: 2026-10-18 12:02:53.718440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73d85ae28a16'
+down_revision: Union[str, None] = '4b9af4b92577'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Без PK таблица могла накопить дубли и пустые записи — убираем их
+    op.execute("DELETE FROM user_event_association WHERE user_id IS NULL OR event_id IS NULL")
+    op.execute(
+        """
+        DELETE FROM user_event_association AS a
+        USING user_event_association AS b
+        WHERE a.user_id = b.user_id AND a.event_id = b.event_id AND a.ctid > b.ctid
+        """
+    )
+    # Дубли попадали и в participants_count — пересчитываем
+    op.execute(
+        """
+        UPDATE events
+        SET participants_count = (
+            SELECT count(*) FROM user_event_association
+            WHERE user_event_association.event_id = events.id
+        )
+        """
+    )
+    op.create_primary_key('user_event_association_pkey', 'user_event_association', ['user_id', 'event_id'])
+    op.create_index('ix_user_event_association_event_id_user_id', 'user_event_association', ['event_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_event_association_event_id_user_id', table_name='user_event_association')
+    op.drop_constraint('user_event_association_pkey', 'user_event_association', type_='primary')
+    op.alter_column('user_event_association', 'event_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('user_event_association', 'user_id', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,127 @@
+"""merge events_on_review into events
+
+Revision ID: c7755fcd923f
+Revises: 5e47acd4ff85
+Create Date: 2026-10-18 16:03:11.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7755fcd923f'
+down_revision: Union[str, None] = '5e47acd4ff85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+APPROVED = sa.text("status = 'approved'")
+PENDING = sa.text("status = 'pending'")
+
+OLD_INDEXES = [
+    ('ix_events_event_date_id', ['event_date', 'id']),
+    ('ix_events_created_at_id', ['created_at', 'id']),
+    ('ix_events_category_event_date_id', ['category', 'event_date', 'id']),
+    ('ix_events_category_created_at_id', ['category', 'created_at', 'id']),
+    ('ix_events_is_approved_event_date_id', ['is_approved', 'event_date', 'id']),
+    ('ix_events_is_approved_created_at_id', ['is_approved', 'created_at', 'id']),
+    ('ix_events_category_is_approved_event_date_id', ['category', 'is_approved', 'event_date', 'id']),
+    ('ix_events_category_is_approved_created_at_id', ['category', 'is_approved', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Всё, что уже лежит в events, было видно в публичных списках — approved
+    op.add_column('events', sa.Column('status', sa.String(), server_default='approved', nullable=False))
+    op.alter_column('events', 'status', server_default='pending')
+    op.add_column('events', sa.Column('claimed_by', sa.Integer(), nullable=True))
+    op.add_column('events', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key('events_claimed_by_fkey', 'events', 'users', ['claimed_by'], ['id'])
+
+    # Заявки переносятся одним INSERT ... SELECT; без автора (creator_id IS NULL)
+    # в events их не положить — такие заявки отбрасываются
+    op.execute(
+        """
+        INSERT INTO events (title, description, event_date, category, image_url, capacity,
+                            creator_id, created_at, status, claimed_by, claimed_at)
+        SELECT title, description, event_date, category, image_url, capacity,
+               creator_id, created_at, 'pending', claimed_by, claimed_at
+        FROM events_on_review
+        WHERE creator_id IS NOT NULL
+        ORDER BY id
+        """
+    )
+    op.drop_table('events_on_review')
+
+    for name, _ in OLD_INDEXES:
+        op.drop_index(name, table_name='events')
+    op.drop_column('events', 'is_approved')
+
+    op.create_index('ix_events_approved_event_date_id', 'events', ['event_date', 'id'], unique=False, postgresql_where=APPROVED)
+    op.create_index('ix_events_approved_created_at_id', 'events', ['created_at', 'id'], unique=False, postgresql_where=APPROVED)
+    op.create_index('ix_events_approved_category_event_date_id', 'events', ['category', 'event_date', 'id'], unique=False, postgresql_where=APPROVED)
+    op.create_index('ix_events_approved_category_created_at_id', 'events', ['category', 'created_at', 'id'], unique=False, postgresql_where=APPROVED)
+    op.create_index('ix_events_pending_id', 'events', ['id'], unique=False, postgresql_where=PENDING)
+    op.create_index('ix_events_pending_claimed_by_id', 'events', ['claimed_by', 'id'], unique=False, postgresql_where=PENDING)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_pending_claimed_by_id', table_name='events')
+    op.drop_index('ix_events_pending_id', table_name='events')
+    op.drop_index('ix_events_approved_category_created_at_id', table_name='events')
+    op.drop_index('ix_events_approved_category_event_date_id', table_name='events')
+    op.drop_index('ix_events_approved_created_at_id', table_name='events')
+    op.drop_index('ix_events_approved_event_date_id', table_name='events')
+
+    op.add_column('events', sa.Column('is_approved', sa.Boolean(), nullable=True))
+    op.execute("UPDATE events SET is_approved = true WHERE status = 'approved'")
+    for name, columns in OLD_INDEXES:
+        op.create_index(name, 'events', columns, unique=False)
+
+    op.create_table('events_on_review',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('event_date', sa.DateTime(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('image_url', postgresql.ARRAY(sa.String()), nullable=True),
+    sa.Column('capacity', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('creator_id', sa.Integer(), nullable=True),
+    sa.Column('claimed_by', sa.Integer(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['claimed_by'], ['users.id'], name='events_on_review_claimed_by_fkey'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_events_on_review_id'), 'events_on_review', ['id'], unique=False)
+    op.create_index('ix_events_on_review_claimed_by_id', 'events_on_review', ['claimed_by', 'id'], unique=False)
+    # Отклонённых в старой схеме не было: заявку удаляли
+    op.execute(
+        """
+        INSERT INTO events_on_review (title, description, event_date, category, image_url, capacity,
+                                      created_at, creator_id, claimed_by, claimed_at)
+        SELECT title, description, event_date, category, image_url, capacity,
+               created_at, creator_id, claimed_by, claimed_at
+        FROM events
+        WHERE status = 'pending'
+        ORDER BY id
+        """
+    )
+    # В старой схеме на заявки ничего не ссылалось: зависимые строки
+    # неопубликованных мероприятий удаляются вместе с ними
+    for table in ('comments', 'favorites', 'event_waitlist', 'user_event_association'):
+        op.execute(
+            f"DELETE FROM {table} WHERE event_id IN (SELECT id FROM events WHERE status <> 'approved')"
+        )
+    op.execute("DELETE FROM events WHERE status <> 'approved'")
+
+    op.drop_constraint('events_claimed_by_fkey', 'events', type_='foreignkey')
+    op.drop_column('events', 'claimed_at')
+    op.drop_column('events', 'claimed_by')
+    op.drop_column('events', 'status')
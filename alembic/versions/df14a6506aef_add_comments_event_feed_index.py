@@ -0,0 +1,28 @@
+"""add comments event feed index
+
+Revision ID: df14a6506aef
+Revises: 73d85ae28a16
+Create Date: 2026-10-18 12:40:09.551827
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'df14a6506aef'
+down_revision: Union[str, None] = '73d85ae28a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_comments_event_id_created_at_id', 'comments', ['event_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_event_id_created_at_id', table_name='comments')
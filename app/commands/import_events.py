@@ -0,0 +1,49 @@
+"""
+Импорт мероприятий из NDJSON или CSV (поля EventCreate) от имени
+администратора. Корректные строки пишутся пачками в одной транзакции,
+ошибки печатаются с номерами строк. Кэш GET /events/ другого процесса
+обновится через EVENT_LIST_CACHE_TTL.
+
+    python -m app.commands.import_events calendar.ndjson --creator admin
+    python -m app.commands.import_events calendar.csv --creator admin --dry-run
+"""
+import argparse
+import sys
+
+from sqlalchemy import insert, select
+
+from app.core.event_io import IO_FORMATS, event_import_batches, guess_format
+from app.db.base import Event, User
+from app.db.session import SessionLocal
+from app.schemas.event import EventImportResult
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="файл NDJSON или CSV")
+    parser.add_argument("--creator", required=True, help="username администратора-создателя")
+    parser.add_argument("--format", choices=IO_FORMATS, help="по умолчанию — по расширению файла")
+    parser.add_argument("--dry-run", action="store_true", help="только проверить строки, ничего не записывать")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        creator_id = db.scalar(select(User.id).filter(User.username == args.creator, User.is_admin.is_(True)))
+        if creator_id is None:
+            sys.exit(f"Администратор {args.creator} не найден")
+
+        result = EventImportResult()
+        with open(args.path, encoding="utf-8-sig", newline="") as lines:
+            for batch in event_import_batches(lines, args.format or guess_format(args.path), creator_id, result):
+                if not args.dry_run:
+                    db.execute(insert(Event), batch)
+        if not args.dry_run:
+            db.commit()
+
+    for error in result.errors:
+        print(f"строка {error.line}: {'; '.join(error.errors)}")
+    action = "Проверено" if args.dry_run else "Импортировано"
+    print(f"{action}: {result.imported}. Ошибок: {result.failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Сборка мусора в media/: удаляет файлы, на которые не ссылаются
+users.avatar_url и events.image_url.
+
+    python -m app.commands.media_gc --dry-run
+    python -m app.commands.media_gc --min-age-hours 24
+"""
+import argparse
+
+from sqlalchemy import func, select
+
+from app.core.media import collect_media_garbage, media_path_from_url
+from app.db.base import Event, User
+from app.db.session import SessionLocal
+from app.routes.upload import UPLOAD_DIR
+
+MEDIA_SUBDIRS = ("avatars", "events")
+
+
+def referenced_media_paths(db) -> set:
+    urls = db.execute(
+        select(User.avatar_url).where(User.avatar_url.is_not(None))
+        .union_all(select(func.unnest(Event.image_url)))
+        .execution_options(yield_per=10000)
+    ).scalars()
+    return {path for path in map(media_path_from_url, urls) if path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="только посчитать, ничего не удалять")
+    parser.add_argument("--min-age-hours", type=float, default=24,
+                        help="не трогать файлы моложе этого возраста (по умолчанию 24)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        referenced = referenced_media_paths(db)
+
+    removed, freed = collect_media_garbage(
+        UPLOAD_DIR, referenced, MEDIA_SUBDIRS, args.min_age_hours * 3600, dry_run=args.dry_run)
+    action = "Будет удалено" if args.dry_run else "Удалено"
+    print(f"Ссылок в БД: {len(referenced)}. {action} файлов: {removed} ({freed / 1024 / 1024:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Создание уменьшенных копий для изображений, загруженных до их появления
+(или после изменения IMAGE_VARIANT_SIZES). Уже созданные копии пропускаются.
+
+    python -m app.commands.media_variants
+    python -m app.commands.media_variants --workers 4
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.commands.media_gc import MEDIA_SUBDIRS
+from app.core.config import settings
+from app.core.media import VARIANT_NAME, generate_image_variants, sniff_image_type
+from app.routes.upload import UPLOAD_DIR
+
+
+def original_images(media_root: str):
+    for subdir in MEDIA_SUBDIRS:
+        directory = os.path.join(media_root, subdir)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if (entry.is_file(follow_symlinks=False)
+                        and not entry.name.startswith(".")
+                        and not VARIANT_NAME.match(entry.name)):
+                    yield entry.path
+
+
+def is_image(path: str) -> bool:
+    with open(path, "rb") as f:
+        return sniff_image_type(f.read(16)) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="число процессов")
+    args = parser.parse_args()
+
+    paths = [path for path in original_images(UPLOAD_DIR) if is_image(path)]
+    created = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(generate_image_variants, path, settings.IMAGE_VARIANT_SIZES) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                created += len(future.result())
+            except Exception as e:
+                failed += 1
+                print(f"{path}: {e}")
+    print(f"Изображений: {len(paths)}. Создано копий: {created}. Ошибок: {failed}")
+
+
+if __name__ == "__main__":
+    main()
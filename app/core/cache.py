@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.metrics import CACHE_HIT_RATIO, CACHE_REQUESTS
+from app.core.pubsub import broker
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats:
+    """Попадания/промахи кэша name: счётчики и доля попаданий в /metrics"""
+
+    def __init__(self, name: str):
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+        CACHE_HIT_RATIO.labels(name).set_function(self.hit_ratio)
+
+    def hit(self):
+        self.hits += 1
+        self._hit_counter.inc()
+
+    def miss(self):
+        self.misses += 1
+        self._miss_counter.inc()
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру LRU-кэш с временем жизни записей.
+    Счётчики попаданий/промахов экспортируются в /metrics с меткой name.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Растёт при каждой инвалидации: set() с устаревшей версией игнорируется,
+        # чтобы запрос, прочитавший БД до инвалидации, не вернул старое значение в кэш
+        self.version = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats(name)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self._stats.hit()
+                    return value
+                del self._data[key]
+        self._stats.miss()
+        return default
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self.version += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedTTLCache(TTLCache):
+    """
+    TTLCache в каждом воркере, удаления через invalidate() рассылаются
+    остальным воркерам через pub/sub (PUBSUB_BACKEND). Если сообщение
+    потерялось (pub/sub переподключается), запись живёт не дольше ttl.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        super().__init__(name, maxsize, ttl)
+        self.channel = f"cache:{name}"
+        self._listener = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+
+    async def _listen(self):
+        async with broker.subscribe([self.channel]) as queue:
+            while True:
+                message = await queue.get()
+                self.delete(message["key"])
+
+    async def invalidate(self, key):
+        self.delete(key)
+        await broker.publish(self.channel, {"key": key})
+
+
+# Кэш ответов: записи под общей версией, bump() делает устаревшими сразу все.
+# Интерфейс бэкендов: version() -> метка версии, get(key, version), set(key, value, version),
+# bump(), start()/stop() из lifespan. Ключи — строки, значения — JSON-совместимые.
+
+
+class MemoryResponseCache:
+    """
+    Кэш ответов в памяти процесса (TTLCache). bump() рассылается остальным
+    воркерам через pub/sub (PUBSUB_BACKEND), каждый очищает свою копию.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.channel = f"cache:{name}"
+        self._cache = TTLCache(name, maxsize, ttl)
+        self._listener = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+
+    async def _listen(self):
+        async with broker.subscribe([self.channel]) as queue:
+            while True:
+                await queue.get()
+                self._cache.clear()
+
+    async def version(self):
+        return self._cache.version
+
+    async def get(self, key: str, version):
+        return self._cache.get(key)
+
+    async def set(self, key: str, value, version):
+        self._cache.set(key, value, version)
+
+    async def bump(self):
+        self._cache.clear()
+        await broker.publish(self.channel, {})
+
+
+class RedisResponseCache:
+    """
+    Общий для всех воркеров кэш в Redis. Версия — счётчик INCR, она входит
+    в ключ записи, поэтому старые записи после bump() просто истекают по TTL.
+    Ошибки Redis не роняют запрос: считаются промахом.
+    """
+
+    def __init__(self, name: str, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis: не установлен пакет redis (requirements.txt)") from e
+
+        self.name = name
+        self.ttl = int(ttl)
+        self._redis = redis.Redis.from_url(url)
+        self._version_key = f"cache:{name}:version"
+        self._stats = CacheStats(name)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        await self._redis.aclose()
+
+    async def version(self):
+        try:
+            return int(await self._redis.get(self._version_key) or 0)
+        except Exception:
+            logger.exception("Redis недоступен (%s)", self.name)
+            return None
+
+    async def get(self, key: str, version):
+        value = None
+        if version is not None:
+            try:
+                value = await self._redis.get(f"cache:{self.name}:{version}:{key}")
+            except Exception:
+                logger.exception("Redis недоступен (%s)", self.name)
+        if value is None:
+            self._stats.miss()
+            return None
+        self._stats.hit()
+        return json.loads(value)
+
+    async def set(self, key: str, value, version):
+        if version is None:
+            return
+        try:
+            await self._redis.set(
+                f"cache:{self.name}:{version}:{key}", json.dumps(value), ex=self.ttl)
+        except Exception:
+            logger.exception("Redis недоступен (%s)", self.name)
+
+    async def bump(self):
+        try:
+            await self._redis.incr(self._version_key)
+        except Exception:
+            logger.exception("Не удалось инвалидировать кэш %s", self.name)
+
+
+def create_response_cache(name: str, maxsize: int, ttl: float):
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisResponseCache(name, settings.REDIS_URL, ttl)
+    return MemoryResponseCache(name, maxsize, ttl)
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 
 categories = ["Концерт", "Спорт", "Кино"]
@@ -9,6 +11,79 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # true — asyncpg + AsyncSession, false — прежний синхронный драйвер,
+    # вызовы которого уходят в threadpool (для постепенного переключения)
+    DB_ASYNC: bool = True
+
+    # Пул соединений (одинаковые параметры для sync и async движков)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800  # секунд, -1 — не пересоздавать
+    DB_POOL_PRE_PING: bool = True
+    # Сколько соединений открыть заранее (параллельно, в фоне после старта);
+    # 0 — пул наполняется лениво первыми запросами
+    DB_POOL_WARMUP: int = 2
+
+    # Реплики только для чтения (DSN, как DATABASE_URL). Роуты на get_read_db
+    # читают с реплики, отстающей не больше REPLICA_MAX_LAG секунд (проверка
+    # раз в REPLICA_LAG_CHECK_INTERVAL), иначе — с основной БД. После успешного
+    # изменяющего запроса клиент (cookie) и пользователь (по токену, во всех
+    # воркерах) READ_YOUR_WRITES_WINDOW секунд читают с основной
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG: float = 5
+    REPLICA_LAG_CHECK_INTERVAL: float = 1
+    READ_YOUR_WRITES_WINDOW: float = 10
+
+    # Старт не трогает схему: lifespan только сверяет ревизию alembic_version
+    # с миграциями из ALEMBIC_CONFIG, /readyz отвечает 503, пока они расходятся
+    DB_SCHEMA_CHECK: bool = True
+    ALEMBIC_CONFIG: str = "alembic.ini"
+    READINESS_TIMEOUT: float = 2
+
+    # SQL-запросы дольше SLOW_QUERY_SECONDS пишутся в лог (нормализованный
+    # текст без значений) и в счётчик db_slow_queries_total; None — не писать
+    SLOW_QUERY_SECONDS: Optional[float] = 0.5
+
+    # Кэш пользователей для get_current_user. Изменения (права администратора,
+    # аватар) сбрасывают запись во всех воркерах сразу через pub/sub;
+    # USER_CACHE_TTL — запасной срок на случай потерянного сообщения
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 30
+
+    # bcrypt: стоимость хеширования и отдельный пул процессов под него.
+    # При смене BCRYPT_ROUNDS хеш пересчитывается при следующем входе
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+
+    # Максимальный размер загружаемого изображения, байт
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+    # Максимальный размер файла импорта мероприятий (/admin/events/import), байт
+    MAX_IMPORT_SIZE: int = 50 * 1024 * 1024
+
+    # Уменьшенные WebP-копии загруженных изображений (px по большей стороне)
+    IMAGE_VARIANT_SIZES: List[int] = [64, 256, 1024]
+    IMAGE_VARIANT_WORKERS: int = 1
+    IMAGE_VARIANT_QUEUE_LIMIT: int = 100
+
+    # Префикс internal-location в nginx (например "/protected-media"): файлы
+    # из /media отдаёт nginx по X-Accel-Redirect, приложение — только заголовки
+    MEDIA_ACCEL_REDIRECT: Optional[str] = None
+
+    # Pub/sub живых обновлений (/live) и инвалидации кэшей процесса:
+    # "postgres" — между воркерами через LISTEN/NOTIFY, "memory" — только
+    # в пределах процесса (для одного воркера: иначе другие воркеры отдают
+    # устаревший кэш до истечения TTL)
+    PUBSUB_BACKEND: str = "postgres"
+
+    # Кэш ответов GET /events/: "memory" — в процессе (инвалидация рассылается
+    # через pub/sub), "redis" — общий кэш в REDIS_URL
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    EVENT_LIST_CACHE_SIZE: int = 1000
+    EVENT_LIST_CACHE_TTL: int = 60
+
     class Config:
         env_file = ".env"
         
@@ -0,0 +1,29 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response, status
+
+
+# Сильные ETag для ответов API: хеш от значений, однозначно определяющих тело
+# (версия строки, агрегаты, параметры запроса), а не от самого тела.
+
+
+def make_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
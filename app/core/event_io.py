@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from app.db.models.event import Event
+from app.schemas.event import EventCreate, EventImportError, EventImportResult, EventStatus
+
+
+# Импорт и экспорт мероприятий файлами: NDJSON (объект на строку) или CSV
+# с заголовком. В CSV список image_url записывается через IMAGE_URL_SEPARATOR,
+# пустая ячейка — null. Файл экспорта можно импортировать обратно:
+# лишние колонки (id, status, ...) при импорте игнорируются.
+
+IO_FORMATS = ("ndjson", "csv")
+IMAGE_URL_SEPARATOR = "|"
+# Строк в одном INSERT при импорте и в одной порции экспорта
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+# Сколько ошибок строк попадает в отчёт (счётчик failed считает все)
+MAX_IMPORT_ERRORS = 100
+
+EXPORT_COLUMNS = (
+    "id", "title", "description", "event_date", "category", "image_url", "capacity",
+    "status", "creator_id", "created_at", "participants_count",
+)
+
+
+def guess_format(filename: str) -> str:
+    return "csv" if filename.lower().endswith(".csv") else "ndjson"
+
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(номер строки файла, запись); нечитаемая строка — вместо записи ValueError"""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, csv_record(record)
+        return
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, ValueError("Некорректный JSON")
+
+
+def csv_record(record: Dict[str, str]) -> Dict[str, Any]:
+    # Пустые ячейки — отсутствующие значения, а не пустые строки
+    record = {key: value for key, value in record.items() if key and value != ""}
+    if "image_url" in record:
+        record["image_url"] = record["image_url"].split(IMAGE_URL_SEPARATOR)
+    return record
+
+
+def validation_messages(error: ValidationError) -> List[str]:
+    return [
+        ".".join(map(str, item["loc"])) + ": " + item["msg"] if item["loc"] else item["msg"]
+        for item in error.errors()
+    ]
+
+
+def event_import_batches(
+    lines: Iterable[str], fmt: str, creator_id: int, result: EventImportResult,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Проверяет строки через EventCreate и отдаёт пачки значений для
+    insert(Event). Ошибки строк и счётчики пишутся в result. Импортированные
+    мероприятия публикуются сразу, как созданные администратором через POST /events/.
+    """
+    batch = []
+    for line_number, record in read_records(lines, fmt):
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            event = EventCreate.model_validate(record)
+        except ValidationError as e:
+            add_import_error(result, line_number, validation_messages(e))
+            continue
+        except ValueError as e:
+            add_import_error(result, line_number, [str(e)])
+            continue
+        batch.append({
+            **event.model_dump(),
+            "category": event.category.value,
+            "creator_id": creator_id,
+            "status": EventStatus.approved.value,
+            "created_at": datetime.utcnow(),
+        })
+        if len(batch) >= batch_size:
+            result.imported += len(batch)
+            yield batch
+            batch = []
+    if batch:
+        result.imported += len(batch)
+        yield batch
+
+
+def add_import_error(result: EventImportResult, line: int, errors: List[str]):
+    result.failed += 1
+    if len(result.errors) < MAX_IMPORT_ERRORS:
+        result.errors.append(EventImportError(line=line, errors=errors))
+
+
+def export_columns():
+    return [getattr(Event, column) for column in EXPORT_COLUMNS]
+
+
+def export_record(row: Sequence[Any]) -> Dict[str, Any]:
+    return {
+        column: value.isoformat() if isinstance(value, datetime) else value
+        for column, value in zip(EXPORT_COLUMNS, row)
+    }
+
+
+def export_header(fmt: str) -> str:
+    return format_rows([EXPORT_COLUMNS], "csv") if fmt == "csv" else ""
+
+
+def format_rows(rows: Iterable[Sequence[Any]], fmt: str) -> str:
+    """Порция строк выгрузки одним куском текста"""
+    if fmt == "ndjson":
+        return "".join(json.dumps(export_record(row), ensure_ascii=False) + "\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow([
+            IMAGE_URL_SEPARATOR.join(value) if isinstance(value, list) else
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ])
+    return buffer.getvalue()
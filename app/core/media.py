@@ -0,0 +1,379 @@
+import hashlib
+import logging
+import os
+import re
+import stat
+import tempfile
+import time
+from functools import lru_cache
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, quote
+
+from fastapi import HTTPException, Request, UploadFile, status
+from fastapi.routing import APIRoute
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.core.config import settings
+from app.core.workers import BoundedProcessPool, PoolSaturatedError
+
+
+CHUNK_SIZE = 1024 * 1024
+# Запас тела multipart-запроса сверх размера файла: границы, заголовки частей
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Уменьшенные копии: <имя без расширения>_<размер>.webp рядом с оригиналом
+VARIANT_NAME = re.compile(r"^(?P<stem>.+)_(?P<size>\d+)\.webp$")
+
+logger = logging.getLogger(__name__)
+
+image_processor = BoundedProcessPool(
+    "image_variants",
+    max_workers=settings.IMAGE_VARIANT_WORKERS,
+    max_queue=settings.IMAGE_VARIANT_QUEUE_LIMIT,
+)
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Расширение по сигнатуре файла (magic bytes), а не по имени от клиента"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _open_temp_file(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".tmp")
+    # mkstemp создаёт файл с правами 0600, а медиа может раздавать другой процесс
+    os.fchmod(fd, 0o644)
+    return os.fdopen(fd, "wb"), path
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _finish_temp_file(out) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+
+
+def _discard_temp_file(out, path: str) -> None:
+    out.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _store_temp_file(tmp_path: str, path: str) -> None:
+    if os.path.exists(path):
+        # Такое содержимое уже лежит в хранилище: копию не держим, а время
+        # изменения обновляем, чтобы сборщик мусора считал файл свежим
+        os.remove(tmp_path)
+        os.utime(path)
+    else:
+        os.replace(tmp_path, path)
+
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="Файл слишком большой"
+    )
+
+
+def limited_upload_route(max_size: int):
+    """
+    Класс роута с лимитом тела запроса: больше max_size байт отклоняется
+    по Content-Length сразу, а без него — как только столько придёт по сети.
+    Без этого Starlette разбирает multipart целиком (файл — во временный
+    файл на диске) и только потом вызывает эндпоинт.
+    """
+
+    class LimitedBodyRequest(Request):
+        async def stream(self):
+            try:
+                declared = int(self.headers.get("content-length", 0))
+            except ValueError:
+                declared = 0
+            if declared > max_size:
+                raise upload_too_large()
+            received = 0
+            async for chunk in super().stream():
+                received += len(chunk)
+                if received > max_size:
+                    raise upload_too_large()
+                yield chunk
+
+    class LimitedUploadRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+
+            async def limited_handler(request: Request):
+                return await handler(LimitedBodyRequest(request.scope, request.receive))
+
+            return limited_handler
+
+    return LimitedUploadRoute
+
+
+async def save_image_upload(file: UploadFile, directory: str, max_size: int) -> str:
+    """
+    Сохраняет загруженное изображение в directory и возвращает имя файла.
+
+    Файл читается кусками по CHUNK_SIZE, запись идёт в threadpool, лимит
+    max_size проверяется по ходу чтения (тело запроса целиком ограничивает
+    limited_upload_route ещё до разбора формы). Данные пишутся во временный файл
+    в том же каталоге и переименовываются атомарно, поэтому по итоговому
+    имени никогда не лежит недописанный файл.
+
+    Имя файла — sha256 содержимого, так что повторная загрузка того же
+    изображения не создаёт копию.
+    """
+    chunk = await file.read(CHUNK_SIZE)
+    ext = sniff_image_type(chunk[:16])
+    if ext is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Недопустимый формат файла"
+        )
+
+    out, tmp_path = await run_in_threadpool(_open_temp_file, directory)
+    digest = hashlib.sha256()
+    try:
+        size = 0
+        while chunk:
+            size += len(chunk)
+            if size > max_size:
+                raise upload_too_large()
+            await run_in_threadpool(_write_chunk, out, digest, chunk)
+            chunk = await file.read(CHUNK_SIZE)
+        await run_in_threadpool(_finish_temp_file, out)
+
+        filename = f"{digest.hexdigest()}.{ext}"
+        await run_in_threadpool(_store_temp_file, tmp_path, os.path.join(directory, filename))
+    except BaseException:
+        await run_in_threadpool(_discard_temp_file, out, tmp_path)
+        raise
+
+    return filename
+
+
+def variant_name(filename: str, size: int) -> str:
+    return f"{filename.rsplit('.', 1)[0]}_{size}.webp"
+
+
+def generate_image_variants(path: str, sizes: List[int]) -> List[str]:
+    """
+    Создаёт WebP-копии изображения, вписанные в квадрат size x size.
+    Выполняется в пуле процессов. Копии крупнее оригинала не создаются,
+    уже существующие не пересоздаются (одинаковое содержимое = одно имя).
+    """
+    from PIL import Image, ImageOps
+
+    directory, filename = os.path.split(path)
+    created = []
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("P", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        for size in sizes:
+            target = os.path.join(directory, variant_name(filename, size))
+            if max(image.size) <= size:
+                continue
+            if os.path.exists(target):
+                # Повторная загрузка: продлеваем жизнь копий вместе с оригиналом (GC)
+                os.utime(target)
+                continue
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".variant-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    variant.save(out, "WEBP", quality=80, method=4)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, target)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            created.append(target)
+    return created
+
+
+def _log_variant_errors(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Не удалось создать уменьшенные копии", exc_info=future.exception())
+
+
+def schedule_image_variants(path: str) -> None:
+    """Ставит создание копий в фоновый пул; ответ на загрузку их не ждёт"""
+    try:
+        future = image_processor.submit(
+            generate_image_variants, path, settings.IMAGE_VARIANT_SIZES)
+    except PoolSaturatedError:
+        # Копий пока не будет, MediaFiles отдаст оригинал
+        logger.warning("Очередь обработки изображений заполнена, пропускаем %s", path)
+        return
+    except Exception:
+        # Пул не поднялся и после пересоздания: загрузка уже сохранена,
+        # ронять запрос из-за копий нельзя — как и выше, копий пока нет
+        logger.exception("Не удалось поставить создание копий %s", path)
+        return
+    future.add_done_callback(_log_variant_errors)
+
+
+def variant_for_size(path: str, size: int) -> Optional[Tuple[str, int]]:
+    """(путь, размер) копии наименьшего размера, не меньшего size; None — нужен оригинал"""
+    directory, filename = os.path.split(path)
+    if VARIANT_NAME.match(filename):
+        return None
+    for variant_size in sorted(settings.IMAGE_VARIANT_SIZES):
+        if variant_size >= size:
+            return os.path.join(directory, variant_name(filename, variant_size)), variant_size
+    return None
+
+
+@lru_cache(maxsize=4096)
+def image_max_side(full_path: str) -> Optional[int]:
+    """
+    Большая сторона изображения (читается только заголовок файла). Кэш по
+    пути безопасен для неизменяемых имён: содержимое по ним не меняется.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(full_path) as image:
+            return max(image.size)
+    except (OSError, ValueError):
+        return None
+
+
+# Имя файла — хеш содержимого (или uuid у старых загрузок), содержимое по
+# URL не меняется никогда: браузеры и CDN могут не перепроверять его год
+IMMUTABLE_NAME = re.compile(r"^(?P<key>(?:[0-9a-f]{64}|[0-9a-f-]{36})(?:_\d+)?)\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Вместо запрошенной копии отдан оригинал — скоро по этому URL будет копия
+FALLBACK_CACHE_CONTROL = "public, max-age=60"
+
+
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles для media/ с выбором размера: /media/avatars/x.png?size=64
+    отдаёт x_64.webp, если копия уже создана, иначе оригинал.
+
+    Для файлов с неизменяемыми именами — Cache-Control immutable и сильный
+    ETag из имени (не зависит от mtime, который трогают дедупликация и GC).
+    Range и If-None-Match/If-Modified-Since обрабатывает StaticFiles.
+    При MEDIA_ACCEL_REDIRECT сам файл отдаёт nginx (X-Accel-Redirect).
+    """
+
+    async def get_response(self, path, scope):
+        variant = None
+        size = parse_qs(scope.get("query_string", b"").decode()).get("size")
+        if size and size[0].isdigit():
+            variant = variant_for_size(path, int(size[0]))
+            if variant is not None:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, variant[0])
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    return self.file_response(full_path, stat_result, scope)
+        response = await super().get_response(path, scope)
+        if variant is not None and "cache-control" in response.headers:
+            if await self.variant_pending(path, variant[1]):
+                response.headers["cache-control"] = FALLBACK_CACHE_CONTROL
+        return response
+
+    async def variant_pending(self, path, variant_size: int) -> bool:
+        """
+        Копии ещё нет, но она появится. Для оригинала не больше variant_size
+        копия не создаётся никогда: он и есть ответ, с обычными заголовками.
+        """
+        if not IMMUTABLE_NAME.match(os.path.basename(path)):
+            return True
+        full_path, _ = await anyio.to_thread.run_sync(self.lookup_path, path)
+        max_side = await anyio.to_thread.run_sync(image_max_side, full_path) if full_path else None
+        return max_side is None or max_side > variant_size
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        headers = {}
+        name = IMMUTABLE_NAME.match(os.path.basename(full_path))
+        if name:
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+            headers["etag"] = f'"{name.group("key")}"'
+        response = FileResponse(full_path, status_code=status_code, headers=headers, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        if settings.MEDIA_ACCEL_REDIRECT:
+            relative = os.path.relpath(full_path, os.path.realpath(self.directory))
+            headers["x-accel-redirect"] = settings.MEDIA_ACCEL_REDIRECT.rstrip("/") + "/" + quote(relative)
+            return Response(headers=headers, media_type=response.media_type)
+        return response
+
+
+def media_path_from_url(url: str) -> Optional[str]:
+    """'/media/avatars/x.png' (или абсолютный URL) -> 'avatars/x.png'"""
+    if not url or "/media/" not in url:
+        return None
+    return url.split("/media/", 1)[1].split("?", 1)[0]
+
+
+def collect_media_garbage(
+    media_root: str,
+    referenced: Set[str],
+    subdirs: Iterable[str],
+    min_age: float,
+    dry_run: bool = False,
+) -> Tuple[int, int]:
+    """
+    Удаляет из media_root/<subdir> файлы, на которые нет ссылок в referenced
+    (пути вида 'avatars/x.png') и которые не менялись дольше min_age секунд.
+    Уменьшенные копии живут, пока есть ссылка на их оригинал.
+    Возраст защищает только что загруженные файлы, на которые ещё не успели
+    сослаться (например, картинка мероприятия до его создания), и
+    недописанные временные файлы. Возвращает (число файлов, байт).
+    """
+    removed = 0
+    freed = 0
+    deadline = time.time() - min_age
+    referenced_stems = {path.rsplit(".", 1)[0] for path in referenced}
+    for subdir in subdirs:
+        directory = os.path.join(media_root, subdir)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if f"{subdir}/{entry.name}" in referenced:
+                    continue
+                variant = VARIANT_NAME.match(entry.name)
+                if variant and f"{subdir}/{variant['stem']}" in referenced_stems:
+                    continue
+                info = entry.stat(follow_symlinks=False)
+                if info.st_mtime > deadline:
+                    continue
+                if not dry_run:
+                    try:
+                        # Повторная проверка прямо перед удалением: файл могли
+                        # загрузить заново (utime) после начала обхода
+                        if os.stat(entry.path).st_mtime > deadline:
+                            continue
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                removed += 1
+                freed += info.st_size
+    return removed, freed
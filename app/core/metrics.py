@@ -0,0 +1,127 @@
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+
+
+# HTTP-запросы (app.core.request_metrics). route — шаблон пути роута
+# ("/events/{event_id}"), а не сам путь, чтобы число рядов не росло с данными
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "Время обработки запроса до отправки последнего байта ответа",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "http_response_bytes",
+    "Размер тела ответа",
+    ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL-запросов за один HTTP-запрос (все движки: основная БД и реплики)",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Суммарное время SQL-запросов за один HTTP-запрос",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+# Медленные SQL-запросы (app.db.query_metrics)
+
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "SQL-запросы дольше SLOW_QUERY_SECONDS",
+)
+
+
+# Пул соединений с БД
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Время получения соединения из пула (ожидание + создание соединения + pre-ping)",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Сколько раз соединение не удалось получить за DB_POOL_TIMEOUT",
+    ["pool"],
+)
+
+
+# Реплики для чтения (app.db.replicas)
+
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Отставание реплики по последней проверке (-1 — реплика недоступна)",
+    ["replica"],
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Сессии get_read_db по тому, куда ушло чтение",
+    ["target"],
+)
+
+
+# Кэши (app.core.cache)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к кэшу",
+    ["cache", "result"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "cache_hit_ratio",
+    "Доля попаданий в кэш с запуска процесса",
+    ["cache"],
+)
+
+
+# Пулы процессов для CPU-тяжёлых задач (app.core.workers.BoundedProcessPool)
+
+WORKER_POOL_PENDING = Gauge(
+    "worker_pool_pending",
+    "Задачи в работе и в очереди пула процессов",
+    ["pool"],
+)
+WORKER_POOL_REJECTED = Counter(
+    "worker_pool_rejected_total",
+    "Задачи, отклонённые из-за заполненной очереди пула",
+    ["pool"],
+)
+
+
+class PoolCollector:
+    """Текущее состояние пулов снимается в момент scrape, а не хранится в гейджах."""
+
+    def __init__(self):
+        self._engines = {}
+
+    def register(self, name, engine):
+        self._engines[name] = engine
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Размер пула соединений", labels=["pool"])
+        checked_in = GaugeMetricFamily(
+            "db_pool_checked_in", "Свободные соединения в пуле", labels=["pool"])
+        checked_out = GaugeMetricFamily(
+            "db_pool_checked_out", "Соединения, выданные запросам", labels=["pool"])
+        overflow = GaugeMetricFamily(
+            "db_pool_overflow", "Соединения сверх pool_size (отрицательно, пока пул не заполнен)",
+            labels=["pool"])
+        for name, engine in self._engines.items():
+            pool = engine.pool
+            size.add_metric([name], pool.size())
+            checked_in.add_metric([name], pool.checkedin())
+            checked_out.add_metric([name], pool.checkedout())
+            overflow.add_metric([name], pool.overflow())
+        return [size, checked_in, checked_out, overflow]
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько сообщений ждёт медленного подписчика, дальше старые отбрасываются
+SUBSCRIBER_QUEUE_SIZE = 100
+# NOTIFY принимает не больше 8000 байт; запас — на имя канала и обёртку
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+def event_channel(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+class MemoryBroker:
+    """
+    Pub/sub внутри одного процесса: publish сразу раздаёт сообщение
+    подписчикам этого процесса. Для тестов и запуска в один воркер.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: Dict[str, Any]):
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channels: Iterable[str]):
+        """Очередь сообщений из channels, пока открыт контекст"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        channels = set(channels)
+        for channel in channels:
+            self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(queue)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class PostgresBroker(MemoryBroker):
+    """
+    Pub/sub между воркерами через LISTEN/NOTIFY: publish делает pg_notify,
+    каждый процесс слушает канал на своём соединении и раздаёт сообщения
+    локальным подписчикам. Полезная нагрузка NOTIFY ограничена ~8 КБ.
+    """
+
+    PG_CHANNEL = "unievent_live"
+    RECONNECT_DELAY = 5
+    # Короткий таймаут: start() ждут при запуске воркера, а у asyncpg по умолчанию 60 с
+    CONNECT_TIMEOUT = 3
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._reconnect_task = None
+        self._stopped = False
+
+    async def start(self):
+        self._stopped = False
+        try:
+            await self._connect()
+        except Exception:
+            # БД ещё не поднялась — запуск воркера не роняем, подключаемся в фоне
+            logger.exception("Не удалось подключиться к pub/sub, повтор в фоне")
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def stop(self):
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def _connect(self):
+        import asyncpg
+
+        self._conn = await asyncpg.connect(self.dsn, timeout=self.CONNECT_TIMEOUT)
+        await self._conn.add_listener(self.PG_CHANNEL, self._on_notify)
+        self._conn.add_termination_listener(self._on_terminate)
+
+    def _on_notify(self, connection, pid, pg_channel, payload):
+        try:
+            data = json.loads(payload)
+            self._deliver(data["channel"], data["message"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Некорректное сообщение pub/sub: %r", payload)
+
+    def _on_terminate(self, connection):
+        if not self._stopped:
+            logger.warning("Соединение LISTEN потеряно, переподключаемся")
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while not self._stopped:
+            await asyncio.sleep(self.RECONNECT_DELAY)
+            try:
+                await self._connect()
+                return
+            except Exception:
+                logger.exception("Не удалось переподключиться к pub/sub")
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        # Живые обновления — не повод ронять запрос, уже записанный в БД
+        payload = notify_payload(channel, message)
+        if payload is None:
+            return
+        if self._conn is None or self._conn.is_closed():
+            logger.warning("pub/sub не подключён, сообщение в %s потеряно", channel)
+            return
+        try:
+            async with self._lock:
+                await self._conn.execute("SELECT pg_notify($1, $2)", self.PG_CHANNEL, payload)
+        except Exception:
+            logger.exception("Не удалось опубликовать сообщение в %s", channel)
+
+
+def notify_payload(channel: str, message: Dict[str, Any]) -> Optional[str]:
+    """
+    Полезная нагрузка NOTIFY. Сообщения publish_event_update сверх
+    NOTIFY_PAYLOAD_LIMIT уходят без data (клиент дочитывает через REST),
+    остальные не отправляются: иначе pg_notify упал бы на каждом слушателе.
+    """
+    payload = json.dumps({"channel": channel, "message": message}, default=str, ensure_ascii=False)
+    size = len(payload.encode())
+    if size <= NOTIFY_PAYLOAD_LIMIT:
+        return payload
+    if "data" in message:
+        logger.warning("Сообщение %s в %s (%s байт) отправлено без data", message.get("type"), channel, size)
+        return json.dumps({"channel": channel, "message": {**message, "data": {"truncated": True}}},
+                          default=str, ensure_ascii=False)
+    logger.error("Сообщение в %s (%s байт) больше лимита NOTIFY, не отправлено", channel, size)
+    return None
+
+
+def create_broker() -> MemoryBroker:
+    if settings.PUBSUB_BACKEND == "postgres":
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        return PostgresBroker(dsn.render_as_string(hide_password=False))
+    # Число воркеров uvicorn и gunicorn берут из WEB_CONCURRENCY; --workers
+    # из командной строки отсюда не видно
+    if int(os.environ.get("WEB_CONCURRENCY", 1)) > 1:
+        logger.warning(
+            "PUBSUB_BACKEND=memory при WEB_CONCURRENCY=%s: живые обновления и "
+            "инвалидация кэшей не дойдут до других воркеров",
+            os.environ["WEB_CONCURRENCY"],
+        )
+    return MemoryBroker()
+
+
+broker = create_broker()
+
+
+async def publish_event_update(event_id: int, message_type: str, data: Dict[str, Any]):
+    await broker.publish(event_channel(event_id), {
+        "type": message_type,
+        "event_id": event_id,
+        "data": data,
+    })
@@ -0,0 +1,70 @@
+import time
+
+from app.core.metrics import (
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    HTTP_RESPONSE_BYTES,
+)
+from app.db.query_metrics import QueryStats, query_stats
+
+# Метод вне списка пишется как OTHER: метку нельзя раздувать произвольными значениями
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope, root_path: str) -> str:
+    """
+    Шаблон пути, который обработал запрос. Роутер дописывает найденный роут
+    в scope, поэтому метка известна только после обработки запроса.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mount (/media) роута в scope не оставляет, только удлиняет root_path
+    mounted = scope.get("root_path", "")[len(root_path):]
+    return mounted + "/{path}" if mounted else UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """
+    Время ответа, размер тела, число и время SQL-запросов по роутам для
+    /metrics. Время считается до отправки последнего байта, поэтому у
+    потоковых ответов (экспорт, /live/sse) это длительность всего потока.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+        root_path = scope.get("root_path", "")
+        stats = QueryStats(method, scope["path"])
+        token = query_stats.set(stats)
+        # Без http.response.start приложение упало, и ответ 500 отправит ServerErrorMiddleware
+        status = 500
+        size = 0
+
+        async def send_counting(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_counting)
+        finally:
+            elapsed = time.perf_counter() - started
+            query_stats.reset(token)
+            route = route_label(scope, root_path)
+            HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(elapsed)
+            HTTP_RESPONSE_BYTES.labels(method, route).observe(size)
+            HTTP_REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+            HTTP_REQUEST_DB_SECONDS.labels(method, route).observe(stats.seconds)
@@ -1,17 +1,29 @@
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
+from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.schemas.user import TokenData
 from app.core.config import settings
+from app.core.workers import BoundedProcessPool, PoolSaturatedError
 
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt (~250 мс CPU) выполняется в отдельных процессах, чтобы шквал логинов
+# не занимал event loop и threadpool остальных эндпоинтов
+password_hasher = BoundedProcessPool(
+    "password_hash",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
 
 
 def hash_password(password: str) -> str:
@@ -22,6 +34,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Возвращает (пароль верен, новый хеш или None, если пересчёт не нужен)"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def run_password_task(fn, *args):
+    try:
+        return await password_hasher.run(fn, *args)
+    except (PoolSaturatedError, BrokenProcessPool):
+        # BrokenProcessPool — пул не поднялся и после пересоздания
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
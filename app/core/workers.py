@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from app.core.metrics import WORKER_POOL_PENDING, WORKER_POOL_REJECTED
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Очередь пула заполнена — задачу не ставим, а сразу отказываем."""
+
+
+class BoundedProcessPool:
+    """
+    Пул процессов для CPU-тяжёлых задач с ограничением на число задач
+    в работе и в очереди (max_workers + max_queue). Сверх лимита run()
+    бросает PoolSaturatedError, не дожидаясь освобождения воркера.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending_gauge = WORKER_POOL_PENDING.labels(name)
+        self._rejected = WORKER_POOL_REJECTED.labels(name)
+
+    def _get_executor(self):
+        # Процессы создаются при первой задаче; spawn, а не fork, —
+        # чтобы не копировать в дочерние процессы event loop и соединения с БД
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self, executor):
+        """
+        Сломанный ProcessPoolExecutor (дочерний процесс убит OOM или упал)
+        отказывает во всех следующих задачах: выбрасываем его, следующая
+        задача создаст новый. executor — тот, на котором случился сбой,
+        чтобы параллельные запросы не пересоздали пул дважды.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logger.warning("Пул процессов %s сломан (процесс завершился аварийно), пересоздаём", self.name)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+            self._pending_gauge.set(self._pending)
+
+    def _submit(self, task):
+        """(executor, future); пул, сломавшийся до постановки задачи, пересоздаётся один раз"""
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(task)
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(task)
+
+    def _submit_counted(self, task):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected.inc()
+                raise PoolSaturatedError(self.name)
+            self._pending += 1
+            self._pending_gauge.set(self._pending)
+        try:
+            executor, future = self._submit(task)
+        except BaseException:
+            self._release(None)
+            raise
+        # Счётчик уменьшается по завершении задачи в пуле, а не по отмене
+        # ожидающего её запроса: иначе отключившиеся клиенты обходили бы лимит
+        future.add_done_callback(self._release)
+        return executor, future
+
+    def submit(self, fn, *args, **kwargs):
+        return self._submit_counted(partial(fn, *args, **kwargs))[1]
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Результат задачи. Если процесс с задачей умер, пул пересоздаётся и
+        задача повторяется один раз; повторный сбой — BrokenProcessPool.
+        """
+        task = partial(fn, *args, **kwargs)
+        executor, future = self._submit_counted(task)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+        executor, future = self._submit_counted(task)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
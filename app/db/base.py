@@ -2,4 +2,5 @@ from app.db.session import Base
 from app.db.models.user import User
 from app.db.models.event import Event
 from app.db.models.comment import Comment
-from app.db.models.event_on_review import EventOnReview
+from app.db.models.favorite import Favorite
+from app.db.models.waitlist import EventWaitlist
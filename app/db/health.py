@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+# Пауза между попытками достучаться до БД при старте (удваивается до максимума)
+STARTUP_RETRY_DELAY = 1
+STARTUP_RETRY_MAX_DELAY = 30
+
+
+class Readiness:
+    """
+    Состояние готовности воркера для /readyz. Схема проверяется один раз
+    (пока не совпала — при каждом /readyz заново, чтобы воркер стал готов
+    сразу после применения миграций).
+    """
+
+    def __init__(self):
+        self.schema_ok = False
+        self.error: Optional[str] = "Проверка схемы БД ещё не выполнена"
+
+
+readiness = Readiness()
+
+
+async def fetch_all(sql: str) -> List:
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            return (await conn.execute(text(sql))).scalars().all()
+
+    def fetch():
+        with engine.connect() as conn:
+            return conn.execute(text(sql)).scalars().all()
+
+    return await run_in_threadpool(fetch)
+
+
+def expected_revisions() -> Optional[Set[str]]:
+    """head-ревизии из alembic/versions; None — конфигурации Alembic рядом нет"""
+    if not os.path.exists(settings.ALEMBIC_CONFIG):
+        return None
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(settings.ALEMBIC_CONFIG)
+    # script_location — относительно alembic.ini, а не текущего каталога
+    location = config.get_main_option("script_location")
+    config.set_main_option("script_location", os.path.join(os.path.dirname(os.path.abspath(settings.ALEMBIC_CONFIG)), location))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+async def check_schema() -> Optional[str]:
+    """
+    Сверяет alembic_version с head-ревизиями миграций. Таблицы не создаются
+    и не отражаются: схемой управляет только `alembic upgrade head`.
+    Возвращает текст ошибки или None. Ошибки соединения пробрасываются.
+    """
+    if not settings.DB_SCHEMA_CHECK:
+        readiness.schema_ok, readiness.error = True, None
+        return None
+    expected = await run_in_threadpool(expected_revisions)
+    if expected is None:
+        logger.warning("%s не найден, ревизия схемы не проверяется", settings.ALEMBIC_CONFIG)
+        readiness.schema_ok, readiness.error = True, None
+        return None
+
+    current = set()
+    if await fetch_all("SELECT to_regclass('alembic_version') IS NOT NULL") == [True]:
+        current = set(await fetch_all("SELECT version_num FROM alembic_version"))
+    if current != expected:
+        error = (f"Схема БД на ревизии {sorted(current) or 'нет'}, ожидается {sorted(expected)}:"
+                 " выполните alembic upgrade head")
+        readiness.schema_ok, readiness.error = False, error
+        return error
+    readiness.schema_ok, readiness.error = True, None
+    return None
+
+
+async def warm_up_pool(size: int):
+    """Открывает size соединений параллельно и возвращает их в пул"""
+    if size <= 0:
+        return
+    if async_engine is not None:
+        connections = await asyncio.gather(*(async_engine.connect().start() for _ in range(size)))
+        await asyncio.gather(*(conn.close() for conn in connections))
+        return
+    connections = await asyncio.gather(*(run_in_threadpool(engine.connect) for _ in range(size)))
+    for conn in connections:
+        conn.close()
+
+
+async def prepare_database():
+    """
+    Фоновая задача lifespan: ждёт БД, сверяет ревизию схемы и прогревает
+    пул. Запуск воркера её не ждёт — пока она не закончилась, /readyz
+    отвечает 503, а /healthz уже 200.
+    """
+    delay = STARTUP_RETRY_DELAY
+    while True:
+        try:
+            error = await check_schema()
+            break
+        except Exception as e:
+            readiness.error = f"БД недоступна: {e.__class__.__name__}"
+            logger.warning("БД недоступна при старте (%s), повтор через %s с", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+    if error:
+        logger.error(error)
+        return
+    try:
+        await warm_up_pool(min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE))
+    except Exception:
+        logger.exception("Не удалось прогреть пул соединений")
+
+
+async def check_ready() -> Optional[str]:
+    """Ошибка для ответа /readyz или None, если воркер готов принимать запросы"""
+    try:
+        if not readiness.schema_ok:
+            return await asyncio.wait_for(check_schema(), settings.READINESS_TIMEOUT)
+        await asyncio.wait_for(fetch_all("SELECT 1"), settings.READINESS_TIMEOUT)
+    except asyncio.TimeoutError:
+        return "БД не ответила за READINESS_TIMEOUT"
+    except Exception as e:
+        return f"БД недоступна: {e.__class__.__name__}"
+    return None
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -16,3 +16,8 @@ class Comment(Base):
 
     author = relationship("User", back_populates="comments")
     event = relationship("Event", back_populates="comments")
+
+    # Лента комментариев мероприятия: keyset по (created_at, id)
+    __table_args__ = (
+        Index("ix_comments_event_id_created_at_id", "event_id", "created_at", "id"),
+    )
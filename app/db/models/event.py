@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.db.session import Base
 from app.db.models import comment
 from sqlalchemy import ARRAY
+from app.schemas.event import EventStatus
+
+# Конфигурация полнотекстового поиска (русская морфология)
+SEARCH_CONFIG = "russian"
+
+# Условие частичных индексов: публичные списки читают только одобренные
+APPROVED = text(f"status = '{EventStatus.approved.value}'")
+PENDING = text(f"status = '{EventStatus.pending.value}'")
 
 class Event(Base):
     __tablename__ = "events"
@@ -15,11 +25,53 @@ class Event(Base):
     event_date = Column(DateTime, nullable=False)
     category = Column(String, index=True)
     image_url = Column(ARRAY(String), nullable=True)
-    is_approved = Column(Boolean, default=False)
+    # Статус модерации (EventStatus). Заявки пользователей создаются
+    # в pending, одобрение и отклонение меняют статус на месте
+    status = Column(String, nullable=False, default=EventStatus.pending.value,
+                    server_default=EventStatus.pending.value)
+    # Модератор, взявший заявку в работу; через REVIEW_CLAIM_TTL заявка снова свободна
+    claimed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    # Счётчик участников поддерживается attend_event / cancel_attendance,
+    # чтобы списки не подгружали participants ради len()
+    participants_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Версия строки для ETag: растёт при каждом изменении мероприятия
+    # или числа участников
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Лимит участников; None — без ограничений. Сверх лимита — event_waitlist
+    capacity = Column(Integer, nullable=True)
+    # Поисковый вектор: заголовок с весом A, описание с весом B. Считается
+    # самим Postgres при записи; в обычных выборках не загружается
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
 
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    creator = relationship("User", back_populates="created_events")
+    creator = relationship("User", back_populates="created_events", foreign_keys=[creator_id])
 
     participants = relationship("User", secondary="user_event_association", back_populates="attended_events")
     comments = relationship("Comment", back_populates="event")
     favorited_by = relationship("Favorite", back_populates="event", cascade="all, delete-orphan")
+
+    @hybrid_property
+    def is_approved(self) -> bool:
+        return self.status == EventStatus.approved.value
+
+    # Частичные индексы под keyset-пагинацию GET /events/ (только approved):
+    # на каждую сортировку (event_date / created_at + id) с фильтром category и без.
+    # (event_date, id) обслуживает и upcoming — диапазон event_date >= now()
+    # (now() в условие частичного индекса не поставить). Очередь модерации —
+    # отдельные частичные индексы по pending.
+    __table_args__ = (
+        Index("ix_events_approved_event_date_id", "event_date", "id", postgresql_where=APPROVED),
+        Index("ix_events_approved_created_at_id", "created_at", "id", postgresql_where=APPROVED),
+        Index("ix_events_approved_category_event_date_id", "category", "event_date", "id",
+              postgresql_where=APPROVED),
+        Index("ix_events_approved_category_created_at_id", "category", "created_at", "id",
+              postgresql_where=APPROVED),
+        Index("ix_events_pending_id", "id", postgresql_where=PENDING),
+        Index("ix_events_pending_claimed_by_id", "claimed_by", "id", postgresql_where=PENDING),
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+    )
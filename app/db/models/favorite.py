@@ -1,5 +1,5 @@
 # models/favorite.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -14,3 +14,8 @@ class Favorite(Base):
 
     user = relationship("User", back_populates="favorites")
     event = relationship("Event", back_populates="favorited_by")
+
+    # Одна запись на пару; индекс же обслуживает проверки is_favorite
+    __table_args__ = (
+        Index("ux_favorites_user_id_event_id", "user_id", "event_id", unique=True),
+    )
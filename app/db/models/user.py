@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -6,8 +6,11 @@ from app.db.session import Base
 user_event_association = Table(
     "user_event_association",
     Base.metadata,
-    Column("user_id", Integer, ForeignKey("users.id")),
-    Column("event_id", Integer, ForeignKey("events.id"))
+    # PK (user_id, event_id): одна запись на пару и поиск по пользователю,
+    # индекс (event_id, user_id): участники мероприятия по порядку id
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("event_id", Integer, ForeignKey("events.id"), primary_key=True),
+    Index("ix_user_event_association_event_id_user_id", "event_id", "user_id"),
 )
 
 
@@ -25,8 +28,7 @@ class User(Base):
 
     attended_events = relationship("Event", secondary=user_event_association, back_populates="participants")
     comments = relationship("Comment", back_populates="author")
-    events_on_review = relationship("EventOnReview", back_populates="user")
 
-    created_events = relationship("Event", back_populates="creator")
+    created_events = relationship("Event", back_populates="creator", foreign_keys="Event.creator_id")
     favorites = relationship("Favorite", back_populates="user", cascade="all, delete-orphan")
 
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.db.session import Base
+
+
+class EventWaitlist(Base):
+    """Очередь на мероприятие с заполненным capacity; порядок — по id"""
+    __tablename__ = "event_waitlist"
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Один раз в очереди; индекс же отдаёт очередь мероприятия по порядку
+        Index("ux_event_waitlist_event_id_user_id", "event_id", "user_id", unique=True),
+        Index("ix_event_waitlist_event_id_id", "event_id", "id"),
+    )
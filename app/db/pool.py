@@ -0,0 +1,27 @@
+import time
+
+from sqlalchemy import exc
+
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CHECKOUT_TIMEOUTS
+
+
+def instrumented_pool(pool_class, name):
+    """
+    Подкласс пула, который пишет время выдачи соединения в гистограмму.
+    Класс, а не обработчик событий: у пула нет события "до ожидания",
+    а recreate() после dispose() создаёт пул того же класса.
+    """
+
+    class InstrumentedPool(pool_class):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                DB_POOL_CHECKOUT_TIMEOUTS.labels(name).inc()
+                raise
+            finally:
+                DB_POOL_CHECKOUT_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
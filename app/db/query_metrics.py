@@ -0,0 +1,87 @@
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import DB_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Длинные запросы (импорт с тысячами VALUES) в логе обрезаются
+MAX_LOGGED_SQL = 2000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+# asyncpg-диалект приводит параметры к типу: $1::VARCHAR, $2::TIMESTAMP WITHOUT TIME ZONE
+_VALUE = r"\?(?:::[A-Z][A-Z ]*[A-Z](?:\[\])?)?"
+_VALUE_LIST = re.compile(rf"{_VALUE}(?:\s*,\s*{_VALUE})+")
+_ROW_LIST = re.compile(r"(\(\?(?:\.\.\.)?\))(?:\s*,\s*\(\?(?:\.\.\.)?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """SQL-запросы одного HTTP-запроса; заводит RequestMetricsMiddleware"""
+
+    __slots__ = ("method", "path", "queries", "seconds")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Объект изменяемый: копии контекста в threadpool (ThreadedSession) пишут в тот же
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Текст запроса без значений: литералы и параметры заменяются на ?,
+    списки IN (...) и строки VALUES сворачиваются, пробелы схлопываются.
+    Одинаковые по форме запросы в логе выглядят одинаково.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _VALUE_LIST.sub("?...", statement)
+    statement = _ROW_LIST.sub(r"\1, ...", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    if len(statement) > MAX_LOGGED_SQL:
+        statement = statement[:MAX_LOGGED_SQL] + "…"
+    return statement
+
+
+# Обработчики на классе Engine: срабатывают для всех движков процесса —
+# синхронного, async_engine (через его sync_engine) и движков реплик
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    stats = query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += seconds
+    if settings.SLOW_QUERY_SECONDS is not None and seconds >= settings.SLOW_QUERY_SECONDS:
+        DB_SLOW_QUERIES.inc()
+        logger.warning(
+            "Медленный запрос %.0f мс%s: %s",
+            seconds * 1000,
+            f" ({stats.method} {stats.path})" if stats is not None else "",
+            normalize_sql(statement),
+        )
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import DB_READ_SESSIONS, DB_REPLICA_LAG_SECONDS, pool_collector
+from app.core.pubsub import broker
+from app.core.security import decode_access_token
+from app.db.pool import instrumented_pool
+from app.db.session import POOL_OPTIONS, open_session
+
+logger = logging.getLogger(__name__)
+
+# Клиент с этой cookie (unix-время) до её истечения читает с основной БД
+READ_PRIMARY_COOKIE = "read_primary_until"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+RECENT_WRITERS_MAXSIZE = 100_000
+
+# Отставание в секундах; если реплика воспроизвела всё полученное WAL,
+# она не отстаёт, даже если на основной давно не было записей. Но только
+# пока WAL-приёмник подключён: отключённая реплика тоже воспроизвела всё
+# полученное и при этом отстаёт сколько угодно — для неё NULL
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    """Движок и пул соединений одной реплики; lag обновляет monitor_replicas"""
+
+    def __init__(self, url: str, index: int):
+        self.name = f"replica{index}"
+        # None — отставание неизвестно (ещё не проверяли или реплика недоступна)
+        self.lag: Optional[float] = None
+        if settings.DB_ASYNC:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+            self.engine = create_async_engine(
+                make_url(url).set(drivername="postgresql+asyncpg"),
+                poolclass=instrumented_pool(AsyncAdaptedQueuePool, self.name),
+                **POOL_OPTIONS,
+            )
+            pool_collector.register(self.name, self.engine.sync_engine)
+            self.session_factory = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.engine = create_engine(url, poolclass=instrumented_pool(QueuePool, self.name), **POOL_OPTIONS)
+            pool_collector.register(self.name, self.engine)
+            self.session_factory = sessionmaker(
+                autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
+
+    async def fetch_lag(self) -> Optional[float]:
+        """None — реплика не получает WAL от основной БД"""
+        if settings.DB_ASYNC:
+            async with self.engine.connect() as conn:
+                lag = await conn.scalar(REPLICA_LAG_SQL)
+        else:
+            def fetch():
+                with self.engine.connect() as conn:
+                    return conn.scalar(REPLICA_LAG_SQL)
+
+            lag = await run_in_threadpool(fetch)
+        return None if lag is None else float(lag)
+
+    @property
+    def usable(self) -> bool:
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG
+
+    async def dispose(self):
+        if settings.DB_ASYNC:
+            await self.engine.dispose()
+        else:
+            self.engine.dispose()
+
+
+replicas: List[Replica] = [Replica(url, i) for i, url in enumerate(settings.DATABASE_REPLICA_URLS, 1)]
+
+
+async def check_replica(replica: Replica):
+    try:
+        lag = await asyncio.wait_for(replica.fetch_lag(), settings.REPLICA_LAG_CHECK_INTERVAL * 5)
+        if lag is None and replica.lag is not None:
+            logger.warning("Реплика %s не получает WAL от основной БД", replica.name)
+        replica.lag = lag
+    except Exception as e:
+        if replica.lag is not None:
+            logger.warning("Реплика %s недоступна: %s", replica.name, e)
+        replica.lag = None
+    DB_REPLICA_LAG_SECONDS.labels(replica.name).set(-1 if replica.lag is None else replica.lag)
+
+
+async def monitor_replicas():
+    """Фоновая задача lifespan: отставание реплик раз в REPLICA_LAG_CHECK_INTERVAL"""
+    while True:
+        await asyncio.gather(*(check_replica(replica) for replica in replicas))
+        await asyncio.sleep(settings.REPLICA_LAG_CHECK_INTERVAL)
+
+
+async def dispose_replicas():
+    for replica in replicas:
+        await replica.dispose()
+
+
+class RecentWriters:
+    """
+    Пользователи, которые READ_YOUR_WRITES_WINDOW секунд назад что-то
+    изменили. В отличие от cookie, окно действует для любого клиента с тем же
+    токеном (мобильное приложение, второй браузер) и во всех воркерах:
+    отметки рассылаются через pub/sub (PUBSUB_BACKEND)
+    """
+
+    def __init__(self):
+        self.channel = "read_your_writes"
+        self._cache = TTLCache("read_your_writes", RECENT_WRITERS_MAXSIZE, settings.READ_YOUR_WRITES_WINDOW)
+        self._listener = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+
+    async def _listen(self):
+        async with broker.subscribe([self.channel]) as queue:
+            while True:
+                message = await queue.get()
+                self._cache.set(message["user_id"], True)
+
+    def __contains__(self, user_id: int) -> bool:
+        return self._cache.get(user_id) is not None
+
+    async def add(self, user_id: int):
+        self._cache.set(user_id, True)
+        await broker.publish(self.channel, {"user_id": user_id})
+
+
+recent_writers = RecentWriters()
+
+
+def token_user_id(headers: Headers) -> Optional[int]:
+    """
+    user_id из Bearer-токена. Проверяются подпись и срок, но не пользователь
+    в БД: для выбора основной БД или реплики этого достаточно
+    """
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    return payload.get("user_id") if payload else None
+
+
+def reads_own_writes(request: Request) -> bool:
+    user_id = token_user_id(request.headers)
+    if user_id is not None and user_id in recent_writers:
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def choose_replica(request: Request) -> Optional[Replica]:
+    """Реплика для чтения или None — читать с основной БД"""
+    if not replicas or reads_own_writes(request):
+        return None
+    usable = [replica for replica in replicas if replica.usable]
+    return random.choice(usable) if usable else None
+
+
+async def get_read_db(request: Request):
+    """
+    Сессия только для чтения: на реплике, если она не отстаёт больше
+    REPLICA_MAX_LAG, иначе (и сразу после записей клиента) — на основной БД.
+    Записывать через неё нельзя.
+    """
+    replica = request.state.read_replica = choose_replica(request)
+    DB_READ_SESSIONS.labels(replica.name if replica else "primary").inc()
+    async with open_session(replica.session_factory if replica else None) as db:
+        yield db
+
+
+@asynccontextmanager
+async def primary_session(request: Request, read_db):
+    """
+    Сессия основной БД для чтений, которым реплика не подходит (заполнение
+    общего кэша). read_db — сессия get_read_db этого запроса: если она и так
+    на основной БД, используется она.
+    """
+    if getattr(request.state, "read_replica", None) is None:
+        yield read_db
+    else:
+        async with open_session() as db:
+            yield db
+
+
+class ReadYourWritesMiddleware:
+    """
+    После успешного изменяющего запроса ставит READ_PRIMARY_COOKIE и отмечает
+    пользователя из токена в recent_writers: следующие READ_YOUR_WRITES_WINDOW
+    секунд его чтения идут на основную БД и видят его запись (attend,
+    комментарий), даже если реплика ещё её не получила
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replicas or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                # До отправки ответа: следующий запрос клиента уже увидит отметку
+                user_id = token_user_id(Headers(scope=scope))
+                if user_id is not None:
+                    await recent_writers.add(user_id)
+                window = int(settings.READ_YOUR_WRITES_WINDOW) + 1
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{READ_PRIMARY_COOKIE}={int(time.time()) + window}; Max-Age={window}; "
+                    "Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
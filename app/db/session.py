@@ -1,21 +1,156 @@
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 from app.core.config import settings
+from app.core.metrics import pool_collector
+from app.db.pool import instrumented_pool
 
 load_dotenv()
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+engine = create_engine(
+    DATABASE_URL, poolclass=instrumented_pool(QueuePool, "sync"), **POOL_OPTIONS)
+pool_collector.register("sync", engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Асинхронный движок (asyncpg). Включается настройкой DB_ASYNC, при выключенной
+# роуты работают через синхронный движок выше, см. ThreadedSession.
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=instrumented_pool(AsyncAdaptedQueuePool, "async"),
+        **POOL_OPTIONS,
+    )
+    pool_collector.register("async", async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False)
+
+# Для ThreadedSession объекты тоже не истекают после commit, чтобы чтение
+# атрибутов в async-роутах не делало скрытых запросов в event loop
+ThreadedSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+class ThreadedSession:
+    """
+    Синхронная Session с интерфейсом AsyncSession: каждое обращение к БД
+    выполняется в threadpool. Режим для постепенного перехода (DB_ASYNC=false),
+    роуты при этом одни и те же.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
 
-def get_db():
-    db = SessionLocal()
-    try:
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        """Как AsyncSession.stream: строки читаются серверным курсором по мере итерации"""
+        result = await run_in_threadpool(
+            self.sync_session.execute, statement.execution_options(stream_results=True), *args, **kwargs)
+        return ThreadedStreamResult(result)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+class ThreadedStreamResult:
+    """Result серверного курсора для ThreadedSession.stream, чтение порций в threadpool"""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size):
+        partitions = self._result.partitions(size)
+        while True:
+            partition = await run_in_threadpool(next, partitions, None)
+            if partition is None:
+                return
+            yield partition
+
+    async def close(self):
+        await run_in_threadpool(self._result.close)
+
+
+@asynccontextmanager
+async def open_session(session_factory=None):
+    """
+    Сессия в режиме DB_ASYNC: AsyncSession или ThreadedSession.
+    session_factory — фабрика того же режима для другого движка (реплики),
+    по умолчанию — основная БД.
+    """
+    if settings.DB_ASYNC:
+        async with (session_factory or AsyncSessionLocal)() as db:
+            yield db
+    else:
+        db = ThreadedSession((session_factory or ThreadedSessionLocal)())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+async def get_db():
+    async with open_session() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def dispose_engines():
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
@@ -1,28 +1,70 @@
-from app.db.session import Base, engine
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from app.db.session import dispose_engines
+from app.db.health import prepare_database
+from app.db.replicas import ReadYourWritesMiddleware, dispose_replicas, monitor_replicas, recent_writers, replicas
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.security import password_hasher
+from app.core.media import MediaFiles, image_processor
+from app.core.pubsub import broker
 from app.routes import auth
 from app.routes import upload
 from app.routes import events
 from app.routes import comments
 from app.routes import admin
 from app.routes import event_on_review
+from app.routes import metrics
+from app.routes import live
+from app.routes import health
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Запуск не ждёт БД: проверка ревизии схемы и прогрев пула идут в фоне,
+    # готовность воркера показывает /readyz
+    database_ready = asyncio.create_task(prepare_database())
+    replica_monitor = asyncio.create_task(monitor_replicas()) if replicas else None
+    await broker.start()
+    await events.event_list_cache.start()
+    await auth.user_cache.start()
+    await recent_writers.start()
+    yield
+    for task in (database_ready, replica_monitor):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await recent_writers.stop()
+    await auth.user_cache.stop()
+    await events.event_list_cache.stop()
+    await broker.stop()
+    password_hasher.shutdown()
+    image_processor.shutdown()
+    await dispose_replicas()
+    await dispose_engines()
 
-app.include_router(upload.router)
 
-# Статическая раздача медиа
-app.mount("/media", StaticFiles(directory="media"), name="media")
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(ReadYourWritesMiddleware)
+# Последним, то есть снаружи: в метрики попадает и время остальных middleware
+app.add_middleware(RequestMetricsMiddleware)
+
+app.include_router(upload.router)
 
-Base.metadata.create_all(bind=engine)
+# Статическая раздача медиа (?size=N — уменьшенная копия)
+app.mount("/media", MediaFiles(directory="media"), name="media")
 
 app.include_router(events.router)
 app.include_router(auth.router)
 app.include_router(comments.router)
 app.include_router(admin.router)
+app.include_router(admin.import_router)
 app.include_router(event_on_review.router)
+app.include_router(metrics.router)
+app.include_router(live.router)
+app.include_router(health.router)
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
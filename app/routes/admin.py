@@ -1,23 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import io
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.event_io import (
+    IO_FORMATS, EXPORT_CHUNK_SIZE, event_import_batches, export_columns, export_header, format_rows, guess_format,
+)
+from app.core.media import UPLOAD_FORM_OVERHEAD, limited_upload_route
 from app.db.session import get_db
+from app.db.models.event import Event
 from app.db.models.user import User
-from app.schemas.user import UserRead
-from app.routes.auth import get_current_admin
+from app.schemas.event import EventImportResult, EventStatus
+from app.schemas.user import UserRead, CurrentUser
+from app.routes.auth import get_current_admin, user_cache
+from app.routes.events import event_list_cache
 
 router = APIRouter(prefix="/admin", tags=["Админ"])
+# Импорт — отдельным роутером: тело запроса ограничено ещё до разбора формы
+import_router = APIRouter(
+    prefix="/admin",
+    tags=["Админ"],
+    route_class=limited_upload_route(settings.MAX_IMPORT_SIZE + UPLOAD_FORM_OVERHEAD),
+)
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
 
 
 @router.put("/assign-admin/{user_id}", response_model=UserRead)
-def assign_admin(
+async def assign_admin(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Назначить пользователя администратором
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,22 +54,23 @@ def assign_admin(
 
     # Назначаем пользователя администратором
     user.is_admin = True
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.id)
 
     return user
 
 
 @router.put("/revoke-admin/{user_id}", response_model=UserRead)
-def revoke_admin(
+async def revoke_admin(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Забрать права администратора у пользователя
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,7 +88,67 @@ def revoke_admin(
 
     # Забираем права администратора у пользователя
     user.is_admin = False
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.id)
 
     return user
+
+
+@import_router.post("/events/import", response_model=EventImportResult)
+async def import_events(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, enum=list(IO_FORMATS), description="По умолчанию — по расширению файла"),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Импорт мероприятий из NDJSON или CSV (поля EventCreate). Файл читается
+    построчно, корректные строки пишутся пачками по IMPORT_BATCH_SIZE в одной
+    транзакции, некорректные пропускаются и попадают в отчёт с номером строки.
+    Чтение файла и валидация пачки идут в threadpool, не блокируя event loop.
+    """
+    fmt = format or guess_format(file.filename or "")
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    result = EventImportResult()
+    batches = event_import_batches(lines, fmt, current_user.id, result)
+    try:
+        while (batch := await run_in_threadpool(next, batches, None)) is not None:
+            await db.execute(insert(Event), batch)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Файл должен быть в кодировке UTF-8")
+    finally:
+        lines.detach()
+    await db.commit()
+    if result.imported:
+        await event_list_cache.bump()
+    return result
+
+
+@router.get("/events/export")
+async def export_events(
+    format: str = Query("ndjson", enum=list(IO_FORMATS)),
+    event_status: Optional[EventStatus] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Выгрузка мероприятий с числом участников по возрастанию id. Строки
+    читаются серверным курсором порциями по EXPORT_CHUNK_SIZE, поэтому
+    память не зависит от размера таблицы.
+    """
+    query = select(*export_columns()).order_by(Event.id)
+    if event_status is not None:
+        query = query.filter(Event.status == event_status.value)
+
+    async def stream():
+        yield export_header(format)
+        result = await db.stream(query)
+        try:
+            async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                yield format_rows(rows, format)
+        finally:
+            await result.close()
+
+    return StreamingResponse(stream(), media_type=EXPORT_MEDIA_TYPES[format], headers={
+        "Content-Disposition": f"attachment; filename=events.{format}"})
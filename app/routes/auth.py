@@ -1,69 +1,80 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import jwt, JWTError
 
-from app.schemas.user import UserCreate, UserRead, Token
+from app.schemas.user import UserCreate, UserRead, Token, CurrentUser
 from app.db.models import user as models
 from app.db.session import get_db
-from app.core.security import hash_password, verify_password, create_access_token, decode_access_token
+from app.core.security import hash_password, verify_and_update_password, run_password_task, create_access_token, decode_access_token
 from app.db.models.user import User
 from datetime import timedelta
+from typing import Optional
 from app.core.config import settings
+from app.core.cache import SharedTTLCache
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["Авторизация"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+# Для публичных роутов, которые авторизованному пользователю отвечают подробнее
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login", auto_error=False)
+
+# Снимки пользователей по id. Роуты, меняющие пользователя, вызывают
+# await user_cache.invalidate(user_id): запись удаляется во всех воркерах,
+# иначе отозванные права администратора действовали бы до USER_CACHE_TTL
+user_cache = SharedTTLCache("users", maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
 
 
 @router.post("/register", response_model=UserRead)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(
-        models.User.username == user.username).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.scalar(select(models.User).filter(
+        models.User.username == user.username))
     if existing:
         raise HTTPException(
             status_code=400, detail="Username already registered")
-    hashed = hash_password(user.password)
+    hashed = await run_password_task(hash_password, user.password)
     db_user = models.User(
         username=user.username,
         hashed_password=hashed,
         is_admin=False,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(
-        models.User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(models.User).filter(
+        models.User.username == form_data.username))
+    if not user:
+        raise HTTPException(
+            status_code=401, detail="Incorrect username or password")
+    valid, new_hash = await run_password_task(
+        verify_and_update_password, form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=401, detail="Incorrect username or password")
+    if new_hash:
+        # BCRYPT_ROUNDS изменился — сохраняем хеш с новой стоимостью
+        user.hashed_password = new_hash
+        await db.commit()
     token = create_access_token({"user_id": user.id}, timedelta(
         minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     return {"access_token": token, "token_type": "bearer"}
 
 
-@router.get("/me", response_model=UserRead)
-def get_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(models.User).filter(
-        models.User.id == payload["user_id"]).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
@@ -73,22 +84,39 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
         if user_id is None:
-            print("нет юзер ид")
+            logger.info("JWT без user_id")
             raise credentials_exception
-    except JWTError:
-        print("жвт ерор")
+    except JWTError as e:
+        logger.info("Некорректный JWT: %s", e)
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        version = user_cache.version
+        db_user = await db.scalar(select(User).filter(User.id == user_id))
+        if db_user is None:
+            raise credentials_exception
+        user = CurrentUser.model_validate(db_user)
+        user_cache.set(user_id, user, version)
     return user
 
 
-def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Optional[CurrentUser]:
+    """Пользователь, если передан токен; None для анонимного запроса"""
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+
+async def get_current_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Требуются права администратора"
         )
     return current_user
+
+
+@router.get("/me", response_model=UserRead)
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
+    return current_user
@@ -1,20 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.db.models.comment import Comment
 from app.db.models.event import Event
 from app.db.models.user import User
 # import Comment, Event, User
 from app.schemas.comment import CommentCreate, CommentRead
+from app.schemas.user import CurrentUser
 from app.routes.auth import get_current_user
+from app.core.pagination import encode_cursor, decode_cursor, parse_cursor_datetime
+from app.core.pubsub import publish_event_update
+from app.core.etag import make_etag, etag_matches, not_modified
 
 router = APIRouter(prefix="/comments", tags=["Комментарии"])
 
+MAX_LIMIT = 100
+# Ограничения пакетного запроса последних комментариев
+MAX_EVENT_IDS = 50
+MAX_PER_EVENT = 20
+COMMENTS_CACHE_CONTROL = "no-cache"
+# Текст комментария в живых обновлениях обрезается (NOTIFY ограничен 8 КБ),
+# полный — в GET /comments/event/{id}
+LIVE_TEXT_PREVIEW = 500
+
 
 @router.post("/", response_model=CommentRead)
-def create_comment(comment_in: CommentCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def create_comment(comment_in: CommentCreate, db: AsyncSession = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
     # Проверим, что мероприятие существует
-    event = db.query(Event).filter(Event.id == comment_in.event_id).first()
+    event = await db.scalar(select(Event).filter(Event.id == comment_in.event_id))
     if not event:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
@@ -24,22 +41,97 @@ def create_comment(comment_in: CommentCreate, db: Session = Depends(get_db), use
         event_id=comment_in.event_id
     )
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment, ["author"])
+    data = CommentRead.model_validate(comment).model_dump(mode="json")
+    if len(data["text"]) > LIVE_TEXT_PREVIEW:
+        data["text"] = data["text"][:LIVE_TEXT_PREVIEW]
+        data["truncated"] = True
+    await publish_event_update(comment.event_id, "comment_created", data)
     return comment
 
 
 @router.get("/event/{event_id}", response_model=list[CommentRead])
-def get_comments_for_event(event_id: int, db: Session = Depends(get_db)):
-    return db.query(Comment).filter(Comment.event_id == event_id).order_by(Comment.created_at.desc()).all()
+async def get_comments_for_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+):
+    """Комментарии мероприятия, новые первыми, с авторами"""
+    order = (Comment.created_at.desc(), Comment.id.desc())
+    page_filter = [Comment.event_id == event_id]
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        page_filter.append(
+            tuple_(Comment.created_at, Comment.id) < tuple_(parse_cursor_datetime(created_at), last_id))
+
+    # Комментарии не редактируются, поэтому ответ определяют id строк страницы
+    # (limit + 1 — есть ли следующая) и поля их авторов (имя и аватар меняются).
+    # Эти колонки берутся по индексу (event_id, created_at, id) и PK users
+    # до загрузки и сериализации страницы
+    page_rows = (await db.execute(
+        select(Comment.id, User.first_name, User.last_name, User.avatar_url)
+        .join(User, User.id == Comment.user_id, isouter=True)
+        .filter(*page_filter)
+        .order_by(*order)
+        .limit(limit + 1)
+    )).all()
+    etag = make_etag(event_id, limit, cursor, [list(row) for row in page_rows])
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, COMMENTS_CACHE_CONTROL)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = COMMENTS_CACHE_CONTROL
+
+    query = (
+        select(Comment)
+        .options(selectinload(Comment.author))
+        .filter(*page_filter)
+        .order_by(*order)
+    )
+    comments = (await db.scalars(query.limit(limit + 1))).all()
+    if len(comments) > limit:
+        comments = comments[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(comments[-1].created_at, comments[-1].id)
+    return comments
+
+
+@router.get("/latest", response_model=Dict[int, List[CommentRead]])
+async def get_latest_comments(
+    event_ids: List[int] = Query(..., max_length=MAX_EVENT_IDS),
+    per_event: int = Query(3, ge=1, le=MAX_PER_EVENT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Последние per_event комментариев для каждого из event_ids одним запросом (для ленты)"""
+    position = func.row_number().over(
+        partition_by=Comment.event_id,
+        order_by=(Comment.created_at.desc(), Comment.id.desc()),
+    ).label("position")
+    ranked = select(Comment.id, position).filter(Comment.event_id.in_(event_ids)).subquery()
+
+    comments = await db.scalars(
+        select(Comment)
+        .join(ranked, ranked.c.id == Comment.id)
+        .filter(ranked.c.position <= per_event)
+        .options(selectinload(Comment.author))
+        .order_by(Comment.event_id, ranked.c.position)
+    )
+    latest = {event_id: [] for event_id in event_ids}
+    for comment in comments:
+        latest[comment.event_id].append(comment)
+    return latest
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(comment_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    comment = db.query(Comment).filter(
-        Comment.id == comment_id, Comment.user_id == user.id).first()
+async def delete_comment(comment_id: int, db: AsyncSession = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    comment = await db.scalar(select(Comment).filter(
+        Comment.id == comment_id, Comment.user_id == user.id))
     if not comment:
         raise HTTPException(
             status_code=404, detail="Комментарий не найден или нет доступа")
-    db.delete(comment)
-    db.commit()
+    await db.delete(comment)
+    await db.commit()
@@ -1,124 +1,264 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.db.models.event import Event
-from app.db.models.event_on_review import EventOnReview
-from app.schemas.event import EventCreate, EventOut
+from app.schemas.event import EventCreate, EventOut, EventStatus
+from app.schemas.event_on_review import EventOnReviewOut, ReviewBulkRequest, ReviewBulkResult
 from app.db.models.user import User
+from app.schemas.user import CurrentUser
 from app.routes.auth import get_current_user, get_current_admin
-from typing import List
+from app.routes.events import event_list_cache
+from app.core.pagination import encode_cursor, decode_cursor
+from typing import List, Optional
 
 router = APIRouter(prefix="/event-on-review",
                    tags=["Мероприятие на рассмотрении"])
 
+MAX_LIMIT = 100
+# Через сколько взятая, но не обработанная заявка снова доступна другим
+REVIEW_CLAIM_TTL = timedelta(minutes=15)
+
+
+def pending_claimable_by(admin_id: int):
+    """Заявка ждёт модерации и свободна, взята этим модератором или её захват истёк"""
+    return and_(
+        Event.status == EventStatus.pending.value,
+        or_(
+            Event.claimed_by.is_(None),
+            Event.claimed_by == admin_id,
+            Event.claimed_at < datetime.utcnow() - REVIEW_CLAIM_TTL,
+        ),
+    )
+
+
+async def set_review_status(db: AsyncSession, ids: List[int], admin_id: int, new_status: EventStatus) -> ReviewBulkResult:
+    """
+    Меняет статус доступных модератору заявок из ids одним UPDATE; без commit.
+    SKIP LOCKED: заявки, которые прямо сейчас обрабатывает другой запрос,
+    пропускаются, а не ждут его.
+    """
+    locked = (
+        select(Event.id)
+        .filter(Event.id.in_(ids), pending_claimable_by(admin_id))
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    values = {"status": new_status.value, "claimed_by": None, "claimed_at": None, "version": Event.version + 1}
+    if new_status == EventStatus.approved:
+        # Мероприятие публикуется сейчас: в сортировке по created_at оно новое
+        values["created_at"] = func.timezone("utc", func.now())
+    processed = sorted((await db.scalars(
+        update(Event)
+        .filter(Event.id.in_(locked))
+        .values(**values)
+        .returning(Event.id)
+        .execution_options(synchronize_session=False)
+    )).all())
+    return ReviewBulkResult(
+        processed=processed,
+        skipped=sorted(set(ids) - set(processed)),
+        event_ids=processed if new_status == EventStatus.approved else [],
+    )
+
+
 # Эндпоинт для создания мероприятия (на рассмотрение)
 
 
-@router.post("/create", response_model=EventOut)
-def create_event_on_review(
+@router.post("/create", response_model=EventOnReviewOut)
+async def create_event_on_review(
     event: EventCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Создание мероприятия на рассмотрение (не требует прав администратора).
-    Мероприятие сохраняется в таблицу на рассмотрении.
+    Мероприятие сохраняется со статусом pending и не попадает в публичные списки.
     """
-    new_event = EventOnReview(**event.dict(), creator_id=current_user.id)
+    new_event = Event(**event.dict(), creator_id=current_user.id, status=EventStatus.pending.value)
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    await db.refresh(new_event)
+    # Заявка появляется в списке GET /events/?is_approved=false для администраторов
+    await event_list_cache.bump()
     return new_event
 
 
 # Эндпоинт для получения всех мероприятий на рассмотрении (только для администраторов)
-@router.get("/on-review", response_model=List[EventOut])
-def get_events_on_review(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+@router.get("/on-review", response_model=List[EventOnReviewOut])
+async def get_events_on_review(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin),
+    limit: int = Query(20, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    mine: bool = Query(False, description="Только заявки, взятые текущим модератором"),
 ):
     """
-    Получить все мероприятия на рассмотрении.
+    Очередь заявок по порядку поступления, keyset-пагинация по id.
     Доступно только администраторам.
     """
-    events_on_review = db.query(EventOnReview).all()
+    query = select(Event).filter(Event.status == EventStatus.pending.value).order_by(Event.id)
+    if mine:
+        query = query.filter(Event.claimed_by == current_user.id)
+    if cursor:
+        last_id, = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        query = query.filter(Event.id > last_id)
+
+    events_on_review = (await db.scalars(query.limit(limit + 1))).all()
+    if len(events_on_review) > limit:
+        events_on_review = events_on_review[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(events_on_review[-1].id)
     return events_on_review
 
 
-# Эндпоинт для одобрения мероприятия
-@router.put("/approve/{event_id}", response_model=EventOut)
-def approve_event(
-    event_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+@router.post("/claim", response_model=List[EventOnReviewOut])
+async def claim_events_on_review(
+    limit: int = Query(10, ge=1, le=MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
-    Одобрить мероприятие и переместить его в основную таблицу мероприятий.
+    Взять в работу до limit первых свободных заявок (или с истёкшим захватом).
+    Несколько модераторов получают непересекающиеся заявки: строки, которые
+    захватывает другой запрос, пропускаются (SKIP LOCKED).
     """
-    event_on_review = db.query(EventOnReview).filter(
-        EventOnReview.id == event_id).first()
-    if not event_on_review:
+    free = (
+        select(Event.id)
+        .filter(
+            Event.status == EventStatus.pending.value,
+            or_(Event.claimed_by.is_(None), Event.claimed_at < datetime.utcnow() - REVIEW_CLAIM_TTL),
+        )
+        .order_by(Event.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    claimed = (await db.scalars(
+        update(Event)
+        .filter(Event.id.in_(free))
+        .values(claimed_by=current_user.id, claimed_at=datetime.utcnow())
+        .returning(Event)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    return sorted(claimed, key=lambda item: item.id)
+
+
+@router.post("/release")
+async def release_events_on_review(
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Вернуть в очередь все заявки, взятые текущим модератором"""
+    released = (await db.scalars(
+        update(Event)
+        .filter(Event.status == EventStatus.pending.value, Event.claimed_by == current_user.id)
+        .values(claimed_by=None, claimed_at=None)
+        .returning(Event.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    return {"released": len(released)}
+
+
+@router.post("/approve", response_model=ReviewBulkResult)
+async def approve_events_bulk(
+    body: ReviewBulkRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Одобрить заявки пачкой одним UPDATE статуса. Заявки, взятые другим
+    модератором или уже обработанные, пропускаются и возвращаются в skipped.
+    """
+    result = await set_review_status(db, body.ids, current_user.id, EventStatus.approved)
+    await db.commit()
+    if result.processed:
+        await event_list_cache.bump()
+    return result
+
+
+@router.post("/reject", response_model=ReviewBulkResult)
+async def reject_events_bulk(
+    body: ReviewBulkRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Отклонить заявки пачкой (статус rejected, мероприятие остаётся у автора)"""
+    result = await set_review_status(db, body.ids, current_user.id, EventStatus.rejected)
+    await db.commit()
+    if result.processed:
+        await event_list_cache.bump()
+    return result
+
+
+async def raise_review_unavailable(db: AsyncSession, event_id: int):
+    if await db.scalar(select(Event.id).filter(Event.id == event_id, Event.status == EventStatus.pending.value)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Мероприятие не найдено"
         )
-
-    # Переносим в основную таблицу
-    new_event = Event(
-        title=event_on_review.title,
-        description=event_on_review.description,
-        event_date=event_on_review.event_date,
-        category=event_on_review.category,
-        creator_id=event_on_review.creator_id
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Заявку обрабатывает другой модератор"
     )
-    db.add(new_event)
-    db.commit()
 
-    # Удаляем из таблицы на рассмотрении
-    db.delete(event_on_review)
-    db.commit()
 
-    return new_event
+# Эндпоинт для одобрения мероприятия
+@router.put("/approve/{event_id}", response_model=EventOut)
+async def approve_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Одобрить мероприятие: статус approved, оно появляется в публичных списках.
+    """
+    result = await set_review_status(db, [event_id], current_user.id, EventStatus.approved)
+    if not result.processed:
+        await raise_review_unavailable(db, event_id)
+    await db.commit()
+    await event_list_cache.bump()
+
+    return await db.scalar(select(Event).filter(Event.id == event_id).execution_options(populate_existing=True))
 
 
 # Эндпоинт для отклонения мероприятия
 @router.put("/reject/{event_id}")
-def reject_event(
+async def reject_event(
     event_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
-    Отклонить мероприятие и удалить его из таблицы на рассмотрении.
+    Отклонить мероприятие: статус rejected, из очереди модерации оно уходит.
     """
-    event_on_review = db.query(EventOnReview).filter(
-        EventOnReview.id == event_id).first()
-    if not event_on_review:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Мероприятие не найдено"
-        )
-
-    # Удаляем мероприятие из таблицы на рассмотрении
-    db.delete(event_on_review)
-    db.commit()
+    result = await set_review_status(db, [event_id], current_user.id, EventStatus.rejected)
+    if not result.processed:
+        await raise_review_unavailable(db, event_id)
+    await db.commit()
+    await event_list_cache.bump()
 
-    return {"detail": "Мероприятие отклонено и удалено из рассмотрения."}
+    return {"detail": "Мероприятие отклонено."}
 
 
 # Эндпоинт для редактирования мероприятия на рассмотрении
-@router.put("/edit/{event_id}", response_model=EventOut)
-def edit_event_on_review(
+@router.put("/edit/{event_id}", response_model=EventOnReviewOut)
+async def edit_event_on_review(
     event_id: int,
     event: EventCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Редактирование мероприятия на рассмотрении.
     """
-    event_on_review = db.query(EventOnReview).filter(
-        EventOnReview.id == event_id).first()
+    event_on_review = await db.scalar(select(Event).filter(
+        Event.id == event_id, Event.status == EventStatus.pending.value))
     if not event_on_review:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -135,8 +275,10 @@ def edit_event_on_review(
     # Обновляем информацию
     for key, value in event.dict().items():
         setattr(event_on_review, key, value)
+    event_on_review.version = Event.version + 1
 
-    db.commit()
-    db.refresh(event_on_review)
+    await db.commit()
+    await db.refresh(event_on_review)
+    await event_list_cache.bump()
 
     return event_on_review
@@ -1,202 +1,637 @@
 # routers/events.py
 # Импорт enum, если вынесен отдельно
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, status, Query, Form, File
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, status, Query, Form, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Set, Tuple
+import html
+import json
+from datetime import datetime
+from pydantic import TypeAdapter
 from app.db.models.favorite import Favorite
 from app.db.session import get_db
-from app.db.models.user import User
-from app.db.models.event import Event
+from app.db.replicas import get_read_db, primary_session
+from app.db.models.user import User, user_event_association
+from app.db.models.event import Event, SEARCH_CONFIG
+from app.db.models.waitlist import EventWaitlist
 from app.schemas.common import UserOut
-from app.schemas.event import EventCreate, EventOut, EventRead, EventUpdate
-from app.routes.auth import get_current_user, get_current_admin
-from sqlalchemy import desc, asc
+from app.schemas.event import EventCreate, EventOut, EventRead, EventSearchOut, EventStatus, EventUpdate
+from app.schemas.user import CurrentUser
+from app.routes.auth import get_current_user, get_current_admin, get_optional_user
+from sqlalchemy import select, update, delete, desc, asc, or_, tuple_, func, literal, literal_column, true
+from sqlalchemy.dialects.postgresql import insert
 from app.schemas.event import EventCategory
+from app.core.pagination import encode_cursor, decode_cursor, parse_cursor_datetime
+from app.core.pubsub import publish_event_update
+from app.core.cache import create_response_cache
+from app.core.etag import make_etag, etag_matches, not_modified
+from app.core.config import settings
 from sqlalchemy.orm import joinedload
 
 
 router = APIRouter(prefix="/events", tags=["Мероприятия"])
 
 @router.post("/", response_model=EventOut)
-def create_event(event: EventCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
-    new_event = Event(**event.dict(), creator_id=current_user.id)
+async def create_event(event: EventCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_admin)):
+    # Мероприятия администратора публикуются сразу, без модерации
+    new_event = Event(**event.dict(), creator_id=current_user.id, status=EventStatus.approved.value)
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    await db.refresh(new_event)
+    await event_list_cache.bump()
     return new_event
 
 
 MAX_LIMIT = 100
 
+# Кэш страниц GET /events/. Роуты, меняющие мероприятия или число участников,
+# вызывают event_list_cache.bump() после commit
+event_list_cache = create_response_cache(
+    "event_list", maxsize=settings.EVENT_LIST_CACHE_SIZE, ttl=settings.EVENT_LIST_CACHE_TTL)
+event_list_adapter = TypeAdapter(List[EventOut])
+
+# Клиент хранит ответ, но перепроверяет его по ETag при каждом запросе
+LIST_CACHE_CONTROL = "no-cache"
+# Карточка мероприятия зависит от пользователя (joined, is_favorite)
+DETAIL_CACHE_CONTROL = "private, no-cache"
+# Сколько участников отдаёт карточка мероприятия
+PARTICIPANTS_PREVIEW_SIZE = 10
+
+
+def status_filter(is_approved: Optional[bool], user: Optional[CurrentUser]):
+    """
+    Фильтр is_approved поверх статуса модерации: по умолчанию и при True —
+    только опубликованные (под них частичные индексы), False — ещё не
+    одобренные, доступно только администраторам
+    """
+    if is_approved is False:
+        if user is None or not user.is_admin:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Требуются права администратора")
+        return Event.status != EventStatus.approved.value
+    return Event.status == EventStatus.approved.value
+
+
+def visible_to(user: Optional[CurrentUser]):
+    """Опубликованные мероприятия видны всем, заявки — автору и администраторам"""
+    if user is None:
+        return Event.status == EventStatus.approved.value
+    if user.is_admin:
+        return true()
+    return or_(Event.status == EventStatus.approved.value, Event.creator_id == user.id)
+
+
+async def load_viewer_flags(db: AsyncSession, user_id: int, event_ids: List[int]) -> Tuple[Set[int], Set[int]]:
+    """Какие из event_ids у пользователя в избранном и где он участник — один запрос на страницу"""
+    if not event_ids:
+        return set(), set()
+    rows = await db.execute(
+        select(literal("favorite"), Favorite.event_id)
+        .filter(Favorite.user_id == user_id, Favorite.event_id.in_(event_ids))
+        .union_all(
+            select(literal("joined"), user_event_association.c.event_id)
+            .filter(user_event_association.c.user_id == user_id,
+                    user_event_association.c.event_id.in_(event_ids))
+        )
+    )
+    favorites, joined = set(), set()
+    for kind, event_id in rows:
+        (favorites if kind == "favorite" else joined).add(event_id)
+    return favorites, joined
+
 
+async def annotate_events(db: AsyncSession, user: Optional[CurrentUser], events: list) -> list:
+    """Заполняет is_favorite / joined у списка EventOut для авторизованного пользователя"""
+    if user is None or not events:
+        return events
+    favorites, joined = await load_viewer_flags(db, user.id, [event.id for event in events])
+    return [
+        event.model_copy(update={"is_favorite": event.id in favorites, "joined": event.id in joined})
+        for event in events
+    ]
 
 
 @router.get("/", response_model=List[EventOut])
-def get_all_events(
-    db: Session = Depends(get_db),
+async def get_all_events(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, le=MAX_LIMIT),
+    limit: int = Query(10, ge=1, le=MAX_LIMIT),
     sort_by: str = Query("event_date", enum=["event_date", "created_at"]),
     order: str = Query("asc", enum=["asc", "desc"]),
     category: Optional[EventCategory] = Query(None),
-     is_approved: Optional[bool] = Query(None)
-    
+    is_approved: Optional[bool] = Query(None, description="false — неодобренные (только для администраторов)"),
+    upcoming: bool = Query(False, description="Только мероприятия, которые ещё не начались"),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы из заголовка X-Next-Cursor (skip при этом игнорируется)"),
+    current_user: Optional[CurrentUser] = Depends(get_optional_user),
 ):
+    status_condition = status_filter(is_approved, current_user)
+    # Страницы кэшируются целиком (тело + курсор) по нормализованному запросу
+    cache_key = json.dumps([
+        None if cursor else skip, limit, sort_by, order,
+        category.value if category else None, is_approved is False, upcoming, cursor,
+    ])
+    cache_version = await event_list_cache.version()
+    page = await event_list_cache.get(cache_key, cache_version)
+    if page is None:
+        # Кэш общий для всех воркеров и живёт до следующего bump(): страница,
+        # прочитанная с отстающей реплики, пережила бы запись, которая его сбросила
+        async with primary_session(request, db) as primary:
+            page = await load_events_page(
+                primary, skip, limit, sort_by, order, category, status_condition, upcoming, cursor)
+        await event_list_cache.set(cache_key, page, cache_version)
+
+    body, etag, cache_control = page["body"], page["etag"], LIST_CACHE_CONTROL
+    if current_user is not None:
+        # Кэш общий для всех; флаги пользователя накладываются поверх страницы
+        favorites, joined = await load_viewer_flags(db, current_user.id, page["ids"])
+        etag = make_etag(etag, current_user.id, sorted(favorites), sorted(joined))
+        cache_control = DETAIL_CACHE_CONTROL
+        if not etag_matches(request.headers.get("if-none-match"), etag):
+            items = json.loads(body)
+            for item in items:
+                item["is_favorite"] = item["id"] in favorites
+                item["joined"] = item["id"] in joined
+            body = json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+    # Для анонимного запроса ETag посчитан при заполнении кэша, и на
+    # попадании 304 отдаётся без запроса к БД
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+    response = Response(content=body, media_type="application/json", headers={
+        "ETag": etag, "Cache-Control": cache_control})
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return response
+
+
+async def load_events_page(db, skip, limit, sort_by, order, category, status_condition, upcoming, cursor) -> dict:
     order_func = asc if order == "asc" else desc
+    sort_column = Event.event_date if sort_by == "event_date" else Event.created_at
 
-    query = db.query(Event)
+    query = select(Event).filter(status_condition)
 
     if category:
         query = query.filter(Event.category == category)
-    if is_approved is not None:  # 👈 добавь фильтрацию по статусу
-        query = query.filter(Event.is_approved == is_approved)
-
-    if sort_by == "event_date":
-        query = query.order_by(order_func(Event.event_date))
+    if upcoming:
+        query = query.filter(Event.event_date >= datetime.utcnow())
+
+    # id — тай-брейкер, чтобы порядок был детерминированным при одинаковых датах
+    query = query.order_by(order_func(sort_column), order_func(Event.id))
+
+    if cursor:
+        # keyset: продолжаем строго после последней строки предыдущей страницы,
+        # поэтому глубина страницы не влияет на стоимость запроса
+        cursor_sort_by, cursor_order, value, last_id = decode_cursor(cursor, 4)
+        if cursor_sort_by != sort_by or cursor_order != order or not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Курсор не соответствует сортировке")
+        keyset = tuple_(sort_column, Event.id)
+        bound = tuple_(parse_cursor_datetime(value), last_id)
+        query = query.filter(keyset > bound if order == "asc" else keyset < bound)
     else:
-        query = query.order_by(order_func(Event.created_at))
+        query = query.offset(skip)
 
-    events = query.options(joinedload(Event.participants)).offset(skip).limit(limit).all()
+    events = (await db.scalars(query.limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        next_cursor = encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+
+    body = event_list_adapter.dump_json(event_list_adapter.validate_python(events, from_attributes=True))
+    return {
+        "body": body.decode(),
+        "ids": [event.id for event in events],
+        "next_cursor": next_cursor,
+        "etag": make_etag(next_cursor, [(event.id, event.version) for event in events]),
+    }
+
+
+# ts_headline отмечает совпадения символами из Private Use Area, а не сразу
+# тегами: пользовательский текст экранируется уже после выделения, и в
+# ответе остаются только наши <b>. Такие же символы в самом тексте удаляются
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\ue000", "\ue001"
+
+
+def headline_sql(column, ts_query, options: str):
+    text = func.translate(func.coalesce(column, ""), HIGHLIGHT_START + HIGHLIGHT_STOP, "")
+    options = f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", {options}'
+    return func.ts_headline(SEARCH_CONFIG, text, ts_query, options)
+
+
+def highlight_html(headline: str) -> str:
+    return html.escape(headline).replace(HIGHLIGHT_START, "<b>").replace(HIGHLIGHT_STOP, "</b>")
+
+
+@router.get("/search", response_model=List[EventSearchOut])
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200,
+                   description="Поисковый запрос: слова, \"фраза\", -исключить, or"),
+    db: AsyncSession = Depends(get_read_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_LIMIT),
+    category: Optional[EventCategory] = Query(None),
+    is_approved: Optional[bool] = Query(None, description="false — неодобренные (только для администраторов)"),
+    current_user: Optional[CurrentUser] = Depends(get_optional_user),
+):
+    """Полнотекстовый поиск по названию и описанию, по убыванию релевантности"""
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(Event.search_vector, ts_query)
+
+    # Сначала страница по GIN-индексу, ts_headline — только для её строк
+    page = select(Event.id, rank.label("rank")).filter(
+        Event.search_vector.op("@@")(ts_query), status_filter(is_approved, current_user))
+    if category:
+        page = page.filter(Event.category == category)
+    page = page.order_by(desc("rank"), Event.id).offset(skip).limit(limit).subquery()
+
+    rows = await db.execute(
+        select(
+            Event,
+            page.c.rank,
+            headline_sql(Event.title, ts_query, "HighlightAll=true"),
+            headline_sql(Event.description, ts_query, "MaxFragments=2, MaxWords=30, MinWords=10"),
+        )
+        .join(page, page.c.id == Event.id)
+        .order_by(page.c.rank.desc(), Event.id)
+    )
+    return await annotate_events(db, current_user, [
+        EventSearchOut(
+            **EventOut.model_validate(event).model_dump(),
+            rank=event_rank,
+            title_headline=highlight_html(title_headline),
+            headline=highlight_html(headline),
+        )
+        for event, event_rank, title_headline, headline in rows
+    ])
 
-# добавляем participants_count вручную
-    result = [
-    EventOut.from_orm(event).model_copy(update={
-        "participants_count": len(event.participants)
-    })
-    for event in events
-]
-    return result
 
 @router.get("/favorites", response_model=list[EventOut])
-def get_favorites(
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user)
+async def get_favorites(
+    db: AsyncSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
-    favorites = (
-        db.query(Event)
+    favorites = await db.scalars(
+        select(Event)
         .join(Favorite, Favorite.event_id == Event.id)
-        .filter(Favorite.user_id == user.id)
-        .all()
+        .filter(Favorite.user_id == user.id, Event.status == EventStatus.approved.value)
     )
-    return favorites
+    return await annotate_events(db, user, [EventOut.model_validate(event) for event in favorites])
+
+def event_detail_etag(event_id, version, creator, user_id, joined, is_favorite) -> str:
+    return make_etag(event_id, version, creator, user_id, joined, is_favorite)
+
 
 @router.get("/{event_id}", response_model=EventRead)
-def get_event(
+async def get_event(
     event_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    event = (
-        db.query(Event)
-        .options(joinedload(Event.creator), joinedload(Event.participants))
-        .filter(Event.id == event_id)
-        .first()
+    """
+    Мероприятие одним запросом: joined / is_favorite через EXISTS, число
+    участников — из счётчика, участники — только первые
+    PARTICIPANTS_PREVIEW_SIZE (полный список — /events/{id}/participants)
+    """
+    joined = select(user_event_association.c.user_id).where(
+        user_event_association.c.event_id == Event.id,
+        user_event_association.c.user_id == current_user.id,
+    ).exists()
+    is_favorite = select(Favorite.id).where(
+        Favorite.event_id == Event.id,
+        Favorite.user_id == current_user.id,
+    ).exists()
+    creator_columns = (User.first_name, User.last_name, User.avatar_url)
+
+    # If-None-Match проверяется по версии строки и флагам пользователя,
+    # без превью участников и сериализации
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        row = (await db.execute(
+            select(Event.version, *creator_columns, joined, is_favorite)
+            .join(User, User.id == Event.creator_id)
+            .filter(Event.id == event_id, visible_to(current_user))
+        )).one_or_none()
+        if row:
+            version, first_name, last_name, avatar_url, row_joined, row_is_favorite = row
+            etag = event_detail_etag(event_id, version, [first_name, last_name, avatar_url],
+                                     current_user.id, row_joined, row_is_favorite)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, DETAIL_CACHE_CONTROL)
+    preview = (
+        select(User.id, User.first_name, User.last_name, User.avatar_url)
+        .join(user_event_association, user_event_association.c.user_id == User.id)
+        .where(user_event_association.c.event_id == Event.id)
+        .order_by(User.id)
+        .limit(PARTICIPANTS_PREVIEW_SIZE)
+        .correlate(Event)
+        .subquery()
     )
-
-    if not event:
-        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
-    
-    is_favorite = (
-        db.query(Favorite)
-        .filter_by(user_id=current_user.id, event_id=event.id)
-        .first() is not None
-        
+    participants = (
+        select(func.coalesce(
+            func.json_agg(func.json_build_object(
+                "id", preview.c.id,
+                "first_name", preview.c.first_name,
+                "last_name", preview.c.last_name,
+                "avatar_url", preview.c.avatar_url,
+            )),
+            literal_column("'[]'::json"),
+        ))
+        .correlate(Event)
+        .scalar_subquery()
     )
 
-    # Используем from_orm и дополняем вычисляемыми полями
-    return EventRead.from_orm(event).model_copy(update={
-        "joined": current_user in event.participants,
-        "participants_count": len(event.participants),
+    row = (await db.execute(
+        select(Event, joined, is_favorite, participants)
+        .options(joinedload(Event.creator))
+        .filter(Event.id == event_id, visible_to(current_user))
+    )).one_or_none()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+    event, joined, is_favorite, participants = row
+
+    response.headers["ETag"] = event_detail_etag(
+        event.id, event.version,
+        [event.creator.first_name, event.creator.last_name, event.creator.avatar_url],
+        current_user.id, joined, is_favorite)
+    response.headers["Cache-Control"] = DETAIL_CACHE_CONTROL
+    return EventRead.model_validate({
+        **EventOut.model_validate(event).model_dump(),
+        "creator": event.creator,
+        "participants": participants,
+        "joined": joined,
         "is_favorite": is_favorite,
     })
 
 
-
 @router.put("/{event_id}", response_model=EventOut)
-def update_event(event_id: int, updated: EventUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    event = db.query(Event).filter(Event.id == event_id).first()
+async def update_event(event_id: int, updated: EventUpdate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    event = await db.scalar(select(Event).filter(Event.id == event_id))
     if not event:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
     if event.creator_id != current_user.id:
         raise HTTPException(
             status_code=403, detail="Нет доступа для редактирования")
 
-    for key, value in updated.dict(exclude_unset=True).items():
+    changes = updated.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(event, key, value)
-
-    db.commit()
-    db.refresh(event)
+    event.version = Event.version + 1
+
+    promoted = []
+    if "capacity" in changes:
+        # Лимит увеличили или сняли — освободившиеся места уходят листу ожидания
+        await db.flush()
+        _, promoted = await fill_from_waitlist(db, event_id)
+    await db.commit()
+    await db.refresh(event)
+    await event_list_cache.bump()
+    # Только имена изменённых полей: описание не ограничено по длине, а NOTIFY
+    # ограничен 8 КБ; само мероприятие клиент перечитывает через GET /events/{id}
+    await publish_event_update(event.id, "event_updated", {"fields": sorted(changes), "version": event.version})
+    if promoted:
+        await publish_attendance_changed(event.id, event.participants_count, promoted)
     return event
 
 
 @router.delete("/{event_id}")
-def delete_event(event_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    event = db.query(Event).filter(Event.id == event_id).first()
+async def delete_event(event_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    event = await db.scalar(select(Event).filter(Event.id == event_id))
     if not event:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
     if event.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Нет доступа для удаления")
 
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
+    await event_list_cache.bump()
     return {"message": "Мероприятие удалено"}
 
 @router.get("/by-user/{user_id}", response_model=List[EventOut])
-def get_events_by_user(user_id: int, db: Session = Depends(get_db)):
-    return db.query(Event).filter(Event.creator_id == user_id).all()
+async def get_events_by_user(user_id: int, db: AsyncSession = Depends(get_read_db), current_user: Optional[CurrentUser] = Depends(get_optional_user)):
+    events = await db.scalars(select(Event).filter(
+        Event.creator_id == user_id, Event.status == EventStatus.approved.value))
+    return await annotate_events(db, current_user, [EventOut.model_validate(event) for event in events])
+
+async def publish_attendance_changed(event_id: int, participants_count: int, promoted: List[int] = ()):
+    await publish_event_update(event_id, "attendance_changed", {
+        "participants_count": participants_count,
+        "promoted": list(promoted),
+    })
 
-@router.post("/{event_id}/attend")
-def attend_event(event_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    event = db.query(Event).filter(Event.id == event_id).first()
 
-    if not event:
-        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+async def fill_from_waitlist(db: AsyncSession, event_id: int) -> Tuple[int, List[int]]:
+    """
+    Переводит первых из листа ожидания в участники, пока есть места.
+    Строка мероприятия блокируется до конца транзакции, поэтому параллельные
+    отмены и изменения capacity не раздадут одно место дважды; SKIP LOCKED —
+    чтобы не ждать записи очереди, которые прямо сейчас удаляет их владелец.
+    Возвращает (participants_count, id переведённых пользователей).
+    """
+    capacity, participants_count = (await db.execute(
+        select(Event.capacity, Event.participants_count)
+        .filter(Event.id == event_id)
+        .with_for_update()
+    )).one()
+    free = None if capacity is None else capacity - participants_count
+    if free is not None and free <= 0:
+        return participants_count, []
+
+    query = (
+        select(EventWaitlist.id, EventWaitlist.user_id)
+        .filter(EventWaitlist.event_id == event_id)
+        .order_by(EventWaitlist.id)
+        .with_for_update(skip_locked=True)
+    )
+    if free is not None:
+        query = query.limit(free)
+    waiting = (await db.execute(query)).all()
+    if not waiting:
+        return participants_count, []
+
+    await db.execute(delete(EventWaitlist).filter(EventWaitlist.id.in_([row.id for row in waiting])))
+    promoted = (await db.scalars(
+        insert(user_event_association)
+        .values([{"user_id": row.user_id, "event_id": event_id} for row in waiting])
+        .on_conflict_do_nothing()
+        .returning(user_event_association.c.user_id)
+    )).all()
+    participants_count = await db.scalar(
+        update(Event)
+        .filter(Event.id == event_id)
+        .values(participants_count=Event.participants_count + len(promoted), version=Event.version + 1)
+        .returning(Event.participants_count)
+    )
+    return participants_count, promoted
 
-    if current_user in event.participants:
-        raise HTTPException(status_code=400, detail="Вы уже записались")
 
-    event.participants.append(current_user)
-    db.commit()
-    return {"detail": "Успешно записались на мероприятие"}
+@router.post("/{event_id}/attend")
+async def attend_event(event_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Запись без загрузки списка участников. Счётчик увеличивается условным
+    UPDATE (capacity IS NULL OR participants_count < capacity): строка
+    мероприятия блокируется, параллельные записи проверяют лимит по очереди.
+    Мест нет — пользователь попадает в лист ожидания.
+    """
+    take_seat = (
+        update(Event)
+        .filter(Event.id == event_id, Event.status == EventStatus.approved.value)
+        .filter(or_(Event.capacity.is_(None), Event.participants_count < Event.capacity))
+        .values(participants_count=Event.participants_count + 1, version=Event.version + 1)
+        .returning(Event.participants_count)
+    )
+    participants_count = await db.scalar(take_seat)
+    if participants_count is None:
+        # Не подошедшую строку UPDATE не блокирует: отмена могла освободить место
+        # и не найти никого в очереди до нашей вставки. Под блокировкой строки
+        # места проверяются ещё раз, а отмена, ждущая её, увидит нас в очереди
+        locked = await db.scalar(
+            select(Event.id)
+            .filter(Event.id == event_id, Event.status == EventStatus.approved.value)
+            .with_for_update()
+        )
+        if locked is None:
+            raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+        participants_count = await db.scalar(take_seat)
+
+    if participants_count is not None:
+        joined = await db.scalar(
+            insert(user_event_association)
+            .values(user_id=current_user.id, event_id=event_id)
+            .on_conflict_do_nothing()
+            .returning(user_event_association.c.user_id)
+        )
+        if joined is None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Вы уже записались")
+        await db.commit()
+        await event_list_cache.bump()
+        await publish_attendance_changed(event_id, participants_count)
+        return {"detail": "Успешно записались на мероприятие", "waitlisted": False}
+
+    # Мест нет, строка мероприятия заблокирована до commit
+    is_participant = select(user_event_association.c.user_id).where(
+        user_event_association.c.event_id == event_id,
+        user_event_association.c.user_id == current_user.id,
+    ).exists()
+    queued = await db.scalar(
+        insert(EventWaitlist)
+        .from_select(
+            ["event_id", "user_id", "created_at"],
+            select(literal(event_id), literal(current_user.id), literal(datetime.utcnow())).where(~is_participant),
+        )
+        .on_conflict_do_nothing()
+        .returning(EventWaitlist.id)
+    )
+    if queued is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Вы уже записались или стоите в листе ожидания")
+    await db.commit()
+    return {"detail": "Мест нет — вы добавлены в лист ожидания", "waitlisted": True}
 
 
 @router.get("/{event_id}/participants", response_model=List[UserOut])
-def get_event_participants(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
-    return event.participants
-
-@router.post("/{event_id}/cancel")
-def cancel_attendance(event_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
+async def get_event_participants(
+    event_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+):
+    """Участники по возрастанию id, keyset-пагинация по первичному ключу (user_id, event_id)"""
+    if await db.scalar(select(Event.id).filter(Event.id == event_id)) is None:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
-    if current_user not in event.participants:
-        raise HTTPException(status_code=400, detail="Вы не записаны")
+    query = (
+        select(User)
+        .join(user_event_association, user_event_association.c.user_id == User.id)
+        .filter(user_event_association.c.event_id == event_id)
+        .order_by(user_event_association.c.user_id)
+    )
+    if cursor:
+        last_id, = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        query = query.filter(user_event_association.c.user_id > last_id)
+
+    users = (await db.scalars(query.limit(limit + 1))).all()
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(users[-1].id)
+
+    # total_events для всей страницы одним GROUP BY
+    totals = dict((await db.execute(
+        select(user_event_association.c.user_id, func.count())
+        .filter(user_event_association.c.user_id.in_([u.id for u in users]))
+        .group_by(user_event_association.c.user_id)
+    )).all()) if users else {}
+
+    return [
+        UserOut.model_validate(user).model_copy(update={"total_events": totals.get(user.id, 0)})
+        for user in users
+    ]
 
-    event.participants.remove(current_user)
-    db.commit()
+@router.post("/{event_id}/cancel")
+async def cancel_attendance(event_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    """Отмена участия (освободившееся место получает первый из листа ожидания) или выход из листа ожидания"""
+    # Сначала строка мероприятия, потом запись участника — в том же порядке,
+    # что и attend_event, иначе встречные attend/cancel взаимно блокируются
+    await db.execute(select(Event.id).filter(Event.id == event_id).with_for_update())
+    left = await db.scalar(
+        delete(user_event_association)
+        .where(user_event_association.c.event_id == event_id,
+               user_event_association.c.user_id == current_user.id)
+        .returning(user_event_association.c.user_id)
+    )
+    if left is None:
+        unqueued = await db.scalar(
+            delete(EventWaitlist)
+            .filter(EventWaitlist.event_id == event_id, EventWaitlist.user_id == current_user.id)
+            .returning(EventWaitlist.id)
+        )
+        if unqueued is None:
+            if await db.scalar(select(Event.id).filter(Event.id == event_id)) is None:
+                raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+            raise HTTPException(status_code=400, detail="Вы не записаны")
+        await db.commit()
+        return {"detail": "Вы покинули лист ожидания"}
+
+    await db.execute(
+        update(Event)
+        .filter(Event.id == event_id)
+        .values(participants_count=Event.participants_count - 1, version=Event.version + 1)
+    )
+    participants_count, promoted = await fill_from_waitlist(db, event_id)
+    await db.commit()
+    await event_list_cache.bump()
+    await publish_attendance_changed(event_id, participants_count, promoted)
     return {"detail": "Вы отменили участие"}
 
 @router.post("/{event_id}/favorite")
-def add_favorite(event_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    favorite = db.query(Favorite).filter_by(user_id=user.id, event_id=event_id).first()
-    if favorite:
+async def add_favorite(event_id: int, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # Уникальный индекс (user_id, event_id): повторная вставка ничего не делает
+    added = await db.scalar(
+        insert(Favorite)
+        .values(user_id=user.id, event_id=event_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[Favorite.user_id, Favorite.event_id])
+        .returning(Favorite.id)
+    )
+    if added is None:
         raise HTTPException(status_code=400, detail="Уже в избранном")
-    db.add(Favorite(user_id=user.id, event_id=event_id))
-    db.commit()
+    await db.commit()
     return {"status": "added"}
 
 
 @router.post("/{event_id}/unfavorite")
-def remove_favorite(event_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    favorite = db.query(Favorite).filter_by(user_id=user.id, event_id=event_id).first()
+async def remove_favorite(event_id: int, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    favorite = await db.scalar(select(Favorite).filter_by(user_id=user.id, event_id=event_id))
     if not favorite:
         raise HTTPException(status_code=404, detail="Не в избранном")
-    db.delete(favorite)
-    db.commit()
+    await db.delete(favorite)
+    await db.commit()
     return {"status": "removed"}
 
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.db.health import check_ready
+
+router = APIRouter(tags=["Мониторинг"])
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """
+    Liveness: процесс жив и обслуживает event loop. БД не проверяется,
+    чтобы её недоступность не приводила к перезапуску воркеров
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz():
+    """
+    Readiness: схема БД на последней миграции и БД отвечает.
+    503 — воркер не должен получать трафик
+    """
+    error = await check_ready()
+    if error:
+        return JSONResponse({"status": "unavailable", "detail": error}, status_code=503)
+    return {"status": "ok"}
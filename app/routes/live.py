@@ -0,0 +1,102 @@
+import asyncio
+import json
+from typing import List, Optional
+
+import anyio
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, WebSocketException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from starlette.requests import HTTPConnection
+
+from app.core.pubsub import broker, event_channel
+from app.db.models.event import Event
+from app.db.session import open_session
+from app.routes.auth import get_current_user
+from app.routes.events import visible_to
+
+router = APIRouter(prefix="/live", tags=["Живые обновления"])
+
+# Ограничение подписок одного соединения
+MAX_EVENT_IDS = 50
+# Пустой комментарий в SSE, чтобы прокси не закрывали простаивающее соединение
+SSE_PING_INTERVAL = 15
+
+TOKEN_DESCRIPTION = "JWT, если нельзя передать заголовок Authorization (EventSource и WebSocket в браузере)"
+
+
+def connection_token(connection: HTTPConnection, token: Optional[str]) -> Optional[str]:
+    scheme, _, value = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and value:
+        return value
+    return token
+
+
+async def visible_event_ids(token: Optional[str], event_ids: List[int]) -> List[int]:
+    """
+    Мероприятия из event_ids, которые пользователю можно смотреть (как в
+    GET /events/{id}): заявки — только автору и администраторам. Сессия своя,
+    а не из Depends: соединение живёт долго, а БД нужна только на проверку.
+    Ошибки токена — HTTPException 401, ни одного доступного — 404.
+    """
+    async with open_session() as db:
+        user = await get_current_user(token, db) if token else None
+        visible = (await db.scalars(select(Event.id).filter(Event.id.in_(event_ids), visible_to(user)))).all()
+    if not visible:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие не найдено")
+    return visible
+
+
+@router.websocket("/ws")
+async def live_websocket(
+    websocket: WebSocket,
+    event_id: List[int] = Query(..., max_length=MAX_EVENT_IDS),
+    token: Optional[str] = Query(None, description=TOKEN_DESCRIPTION),
+):
+    """
+    Сообщения comment_created / attendance_changed / event_updated
+    по мероприятиям из event_id: /live/ws?event_id=1&event_id=2.
+    Сообщения короткие: event_updated — имена изменённых полей и version,
+    текст комментария — первые символы (truncated); остальное — через REST.
+    Недоступные пользователю мероприятия из подписки выпадают
+    """
+    try:
+        event_ids = await visible_event_ids(connection_token(websocket, token), event_id)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+    await websocket.accept()
+    async with broker.subscribe(map(event_channel, event_ids)) as queue:
+        async def forward():
+            while True:
+                await websocket.send_json(await queue.get())
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(forward)
+            # Клиенту писать нечего; ждём закрытия, чтобы снять подписку
+            try:
+                while True:
+                    await websocket.receive_text()
+            except WebSocketDisconnect:
+                pass
+            tg.cancel_scope.cancel()
+
+
+@router.get("/sse")
+async def live_sse(
+    request: Request,
+    event_id: List[int] = Query(..., max_length=MAX_EVENT_IDS),
+    token: Optional[str] = Query(None, description=TOKEN_DESCRIPTION),
+):
+    """То же, что /live/ws, в виде Server-Sent Events"""
+    event_ids = await visible_event_ids(connection_token(request, token), event_id)
+
+    async def stream():
+        async with broker.subscribe(map(event_channel, event_ids)) as queue:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
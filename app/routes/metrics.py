@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter(tags=["Мониторинг"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Метрики в формате Prometheus
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,15 +1,22 @@
-from fastapi import Depends, UploadFile, File, APIRouter, HTTPException, status
-from uuid import uuid4
+from fastapi import Depends, UploadFile, File, APIRouter
 import os
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.media import UPLOAD_FORM_OVERHEAD, limited_upload_route, save_image_upload, schedule_image_variants
 from app.db.session import get_db
 from app.db.models.user import User
 # твоя зависимость для получения авторизованного пользователя
-from app.routes.auth import get_current_user
+from app.schemas.user import CurrentUser
+from app.routes.auth import get_current_user, user_cache
 
 
-router = APIRouter(prefix="/upload", tags=["Загрузка изображений"])
+router = APIRouter(
+    prefix="/upload",
+    tags=["Загрузка изображений"],
+    route_class=limited_upload_route(settings.MAX_UPLOAD_SIZE + UPLOAD_FORM_OVERHEAD),
+)
 
 UPLOAD_DIR = "media"
 
@@ -17,46 +24,29 @@ UPLOAD_DIR = "media"
 @router.post("/upload/avatar")
 async def upload_avatar(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    # Проверка расширения (опционально)
-    allowed_exts = {"jpg", "jpeg", "png", "gif", "webp"}
-    ext = file.filename.split(".")[-1].lower()
-    if ext not in allowed_exts:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Недопустимый формат файла"
-        )
-
-    # Генерация имени файла
-    filename = f"{uuid4()}.{ext}"
-    filepath = os.path.join(UPLOAD_DIR, "avatars", filename)
-
-    # Создание папки, если не существует
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-
-    # Сохраняем файл
-    with open(filepath, "wb") as buffer:
-        buffer.write(await file.read())
+    # Формат определяется по содержимому, файл пишется потоково
+    directory = os.path.join(UPLOAD_DIR, "avatars")
+    filename = await save_image_upload(file, directory, settings.MAX_UPLOAD_SIZE)
+    # Уменьшенные копии создаются в фоне, см. MediaFiles
+    schedule_image_variants(os.path.join(directory, filename))
 
     # Обновляем пользователя в БД
     avatar_url = f"/media/avatars/{filename}"
-    current_user.avatar_url = avatar_url
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.execute(
+        update(User).where(User.id == current_user.id).values(avatar_url=avatar_url))
+    await db.commit()
+    await user_cache.invalidate(current_user.id)
 
     return {"url": avatar_url}
 
 
 @router.post("/upload/event_image")
 async def upload_event_image(file: UploadFile = File(...)):
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid4()}.{ext}"
-    filepath = os.path.join(UPLOAD_DIR, "events", filename)
-
-    with open(filepath, "wb") as buffer:
-        buffer.write(await file.read())
+    directory = os.path.join(UPLOAD_DIR, "events")
+    filename = await save_image_upload(file, directory, settings.MAX_UPLOAD_SIZE)
+    schedule_image_variants(os.path.join(directory, filename))
 
     return {"url": f"/media/events/{filename}"}
@@ -1,5 +1,7 @@
 from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
+from app.schemas.common import UserOut
 
 
 class CommentBase(BaseModel):
@@ -15,6 +17,7 @@ class CommentRead(CommentBase):
     user_id: int
     event_id: int
     created_at: datetime
+    author: Optional[UserOut] = None
 
     class Config:
         from_attributes = True
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
 from app.schemas.common import UserOut
 from pydantic import ConfigDict
@@ -13,12 +13,20 @@ class EventCategory(str, Enum):
     cinema = "Кино"
     other = "Другое"
 
+
+class EventStatus(str, Enum):
+    # Заявка ждёт модерации; публичные списки показывают только approved
+    pending = "pending"
+    approved = "approved"
+    rejected = "rejected"
+
 class EventBase(BaseModel):
     title: str
     description: str
     event_date: datetime
     category: EventCategory
     image_url: Optional[List[str]] = None
+    capacity: Optional[int] = Field(None, ge=1)
 
 
 class EventCreate(EventBase):
@@ -30,22 +38,39 @@ class EventUpdate(BaseModel):
     event_date: Optional[datetime] = None
     category: Optional[EventCategory] = None
     image_url: Optional[List[str]] = None
-    is_approved: Optional[bool] = None  # 👈 здесь можно обновлять
+    capacity: Optional[int] = Field(None, ge=1)
 
 class EventOut(EventBase):
     id: int
     created_at: datetime
     creator_id: int
+    status: EventStatus
     is_approved: bool
     participants_count: Optional[int] = 0
     is_favorite: Optional[bool] = False
+    joined: Optional[bool] = False
 
     model_config = ConfigDict(from_attributes=True)
 
+class EventSearchOut(EventOut):
+    rank: float
+    # HTML: экранированные фрагменты текста, найденные слова в <b>...</b>
+    title_headline: str
+    headline: str
+
 class EventRead(EventOut):
     participants: List[UserOut] = []
     creator: Optional[UserOut] = None
-    joined: Optional[bool] = False
     
 
     model_config = ConfigDict(from_attributes=True)
+
+class EventImportError(BaseModel):
+    line: int
+    errors: List[str]
+
+class EventImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    # Первые MAX_IMPORT_ERRORS ошибок с номерами строк файла
+    errors: List[EventImportError] = []
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from app.schemas.event import EventBase, EventStatus
+
+# Сколько заявок можно обработать одним запросом
+MAX_BULK_IDS = 500
+
+
+class EventOnReviewOut(EventBase):
+    id: int
+    created_at: datetime
+    creator_id: Optional[int] = None
+    status: EventStatus
+    claimed_by: Optional[int] = None
+    claimed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReviewBulkRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+
+
+class ReviewBulkResult(BaseModel):
+    # Обработанные заявки и пропущенные (нет такой или её взял другой модератор)
+    processed: List[int]
+    skipped: List[int]
+    # id опубликованных мероприятий (только для approve; заявка и есть мероприятие)
+    event_ids: List[int] = []
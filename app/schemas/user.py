@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 
@@ -34,6 +34,19 @@ class UserRead(UserBase):
         from_attributes = True
 
 
+class CurrentUser(BaseModel):
+    """Снимок авторизованного пользователя, который хранится в кэше get_current_user"""
+    id: int
+    username: str
+    avatar_url: Optional[str]
+    is_admin: bool
+    created_at: datetime
+    first_name: str
+    last_name: str
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -0,0 +1,104 @@
+"""
+Задержки логина и остальных эндпоинтов во время шквала логинов.
+
+Запускается против поднятого сервера (нужен httpx):
+
+    python benchmarks/login_storm.py --base-url http://127.0.0.1:8000 \
+        --username bench --password bench --storm 64 --duration 15
+
+Сначала замеряется фон (только --probe-path), затем тот же пробник вместе
+с --storm параллельными логинами. Печатает p50/p99 и число ответов 503,
+которыми сервер отсекает логины сверх PASSWORD_HASH_QUEUE_LIMIT.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Stats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.statuses = Counter()
+
+    def add(self, status, seconds):
+        self.statuses[status] += 1
+        if status < 500:
+            self.latencies.append(seconds * 1000)
+
+    def report(self):
+        ok = self.latencies
+        statuses = ", ".join(f"{code}: {n}" for code, n in sorted(self.statuses.items()))
+        print(
+            f"{self.name:<22} n={len(ok):<6} p50={percentile(ok, 50):8.1f} мс  "
+            f"p99={percentile(ok, 99):8.1f} мс  mean={statistics.fmean(ok) if ok else float('nan'):8.1f} мс  [{statuses}]"
+        )
+
+
+async def worker(client, deadline, stats, request):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await request(client)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 599
+        stats.add(status, time.perf_counter() - start)
+
+
+async def run_phase(args, storm):
+    login_stats = Stats("login")
+    probe_stats = Stats(f"GET {args.probe_path}")
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.storm + args.probe + 10)
+
+    async def login(client):
+        return await client.post(
+            "/login", data={"username": args.username, "password": args.password})
+
+    async def probe(client):
+        return await client.get(args.probe_path)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        tasks = [worker(client, deadline, probe_stats, probe) for _ in range(args.probe)]
+        if storm:
+            tasks += [worker(client, deadline, login_stats, login) for _ in range(args.storm)]
+        await asyncio.gather(*tasks)
+    return login_stats, probe_stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--storm", type=int, default=64, help="параллельных логинов")
+    parser.add_argument("--probe", type=int, default=4, help="параллельных запросов к --probe-path")
+    parser.add_argument("--probe-path", default="/events/")
+    parser.add_argument("--duration", type=float, default=15, help="секунд на каждую фазу")
+    args = parser.parse_args()
+
+    print(f"Фон: только {args.probe_path}, {args.duration:.0f} с")
+    _, probe_stats = await run_phase(args, storm=False)
+    probe_stats.report()
+
+    print(f"Шквал: {args.storm} параллельных логинов + {args.probe_path}, {args.duration:.0f} с")
+    login_stats, probe_stats = await run_phase(args, storm=True)
+    login_stats.report()
+    probe_stats.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Время запуска воркера: от старта процесса до первого ответа.
+
+Запускается из корня репозитория с тем же окружением (.env), что и сервер
+(нужен httpx):
+
+    python benchmarks/startup_time.py --runs 5 --port 8099
+
+Каждый прогон поднимает отдельный `uvicorn app.main:app` и опрашивает его.
+Печатает p50/max по трём замерам:
+  import   — `import app.main` в чистом интерпретаторе;
+  healthz  — от запуска процесса до первого 200 на /healthz (первый запрос);
+  readyz   — до первого 200 на /readyz (ревизия схемы проверена, БД отвечает).
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def report(name, seconds):
+    ms = [s * 1000 for s in seconds]
+    print(f"{name:<8} n={len(ms):<3} p50={percentile(ms, 50):8.1f} мс  "
+          f"max={max(ms, default=float('nan')):8.1f} мс  mean={statistics.fmean(ms) if ms else float('nan'):8.1f} мс")
+
+
+def measure_import():
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def wait_for(client, path, started, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{path} не ответил 200")
+
+
+def measure_server(port, timeout):
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            healthz = wait_for(client, "/healthz", started, deadline)
+            readyz = wait_for(client, "/readyz", started, deadline)
+        return healthz, readyz
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=60, help="секунд на один запуск")
+    args = parser.parse_args()
+
+    imports, healthz, readyz = [], [], []
+    for _ in range(args.runs):
+        imports.append(measure_import())
+        first, ready = measure_server(args.port, args.timeout)
+        healthz.append(first)
+        readyz.append(ready)
+
+    report("import", imports)
+    report("healthz", healthz)
+    report("readyz", readyz)
+
+
+if __name__ == "__main__":
+    main()